@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import fitz
+
+from pdf_text_ocr import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    extract_text_blocks,
+    has_ocr_layer,
+    load_throughput,
+)
+
+# =========================
+# 0. 예상 시간 기본값
+# =========================
+# 처리 속도 기록(throughput.json)이 없을 때 쓰는 대략적인 페이지당 초
+DEFAULT_SEC_PER_PAGE = {
+    "text": 0.02,
+    "ocr": {
+        "fast": 2.0,
+        "balanced": 3.5,
+        "best": 10.0,
+        "binarized": 4.0,
+    },
+}
+
+
+def sec_per_page(profile: str, route: str, throughput: dict):
+    """(페이지당 초, 실측 여부)"""
+    measured = throughput.get(profile, {}).get(route)
+    if measured:
+        return measured["sec_per_page"], True
+    if route == "text":
+        return DEFAULT_SEC_PER_PAGE["text"], False
+    return DEFAULT_SEC_PER_PAGE["ocr"].get(profile, DEFAULT_SEC_PER_PAGE["ocr"]["best"]), False
+
+
+# =========================
+# 1. 페이지 / 문서 분석 (렌더링, OCR 없음)
+# =========================
+def analyze_page(page) -> dict:
+    """
+    텍스트 레이어와 이미지 메타데이터만으로 페이지를 분석.
+    - route : extract_pdf_to_text()가 선택할 경로 예측 ("text" / "ocr-layer" / "ocr")
+    - images: 페이지에 놓인 이미지의 픽셀 크기와 실제 배치 기준 dpi
+    - blank : 텍스트도 이미지도 없는 페이지 (벡터 그림만 있는 페이지도 포함될 수 있음)
+    """
+    if has_ocr_layer(page):
+        route = "ocr-layer"
+    else:
+        route = "text" if extract_text_blocks(page) else "ocr"
+
+    images = []
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        width_in = (x1 - x0) / 72
+        images.append({
+            "width": info["width"],
+            "height": info["height"],
+            "dpi": round(info["width"] / width_in) if width_in > 0 else None,
+        })
+
+    blank = route == "ocr" and not images and not page.get_text("text").strip()
+
+    return {
+        "page": page.number + 1,
+        "route": route,
+        "images": images,
+        "blank": blank,
+    }
+
+
+def analyze_pdf(pdf_path: str, profile: str = DEFAULT_PROFILE, throughput: dict = None) -> dict:
+    if throughput is None:
+        throughput = load_throughput()
+
+    with fitz.open(pdf_path) as doc:
+        pages = [analyze_page(page) for page in doc]
+
+    # 이 도구의 OCR 레이어 페이지는 텍스트 경로와 같은 비용
+    text_pages = sum(1 for p in pages if p["route"] != "ocr")
+    ocr_pages = len(pages) - text_pages
+    text_spp, text_measured = sec_per_page(profile, "text", throughput)
+    ocr_spp, ocr_measured = sec_per_page(profile, "ocr", throughput)
+
+    dpis = [img["dpi"] for p in pages for img in p["images"] if img["dpi"]]
+    pixels = [(img["width"], img["height"]) for p in pages for img in p["images"]]
+
+    return {
+        "path": pdf_path,
+        "pages": pages,
+        "page_count": len(pages),
+        "text_pages": text_pages,
+        "ocr_pages": ocr_pages,
+        "blank_pages": sum(1 for p in pages if p["blank"]),
+        "image_count": len(pixels),
+        "max_image": max(pixels, key=lambda wh: wh[0] * wh[1]) if pixels else None,
+        "dpi_min": min(dpis) if dpis else None,
+        "dpi_median": round(statistics.median(dpis)) if dpis else None,
+        "est_seconds": text_pages * text_spp + ocr_pages * ocr_spp,
+        "measured": (text_measured or not text_pages) and (ocr_measured or not ocr_pages),
+    }
+
+
+def iter_pdf_paths(paths):
+    """파일은 그대로, 폴더는 안의 *.pdf 를 재귀적으로"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+# =========================
+# 2. 출력
+# =========================
+def format_seconds(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_report(reports, workers: int = 1, show_pages: bool = False) -> str:
+    lines = [
+        f"{'file':<40} {'pages':>6} {'text':>6} {'ocr':>6} {'blank':>6} "
+        f"{'images':>7} {'max image':>11} {'dpi min/med':>12} {'est':>9}",
+    ]
+
+    for r in reports:
+        name = os.path.basename(r["path"])
+        if len(name) > 40:
+            name = name[:37] + "..."
+        max_image = f"{r['max_image'][0]}x{r['max_image'][1]}" if r["max_image"] else "-"
+        dpi = f"{r['dpi_min']}/{r['dpi_median']}" if r["dpi_min"] else "-"
+        lines.append(
+            f"{name:<40} {r['page_count']:>6} {r['text_pages']:>6} {r['ocr_pages']:>6} "
+            f"{r['blank_pages']:>6} {r['image_count']:>7} {max_image:>11} {dpi:>12} "
+            f"{format_seconds(r['est_seconds'] / workers):>9}"
+        )
+
+        if show_pages:
+            for p in r["pages"]:
+                images = ", ".join(
+                    f"{img['width']}x{img['height']}@{img['dpi']}dpi" for img in p["images"]
+                )
+                blank = " (빈 페이지 후보)" if p["blank"] else ""
+                lines.append(f"    {p['page']:>5}p {p['route']:<9} {images}{blank}")
+
+    total_seconds = sum(r["est_seconds"] for r in reports)
+    lines.append(
+        f"{'TOTAL':<40} {sum(r['page_count'] for r in reports):>6} "
+        f"{sum(r['text_pages'] for r in reports):>6} {sum(r['ocr_pages'] for r in reports):>6} "
+        f"{sum(r['blank_pages'] for r in reports):>6} {sum(r['image_count'] for r in reports):>7} "
+        f"{'':>11} {'':>12} {format_seconds(total_seconds / workers):>9}"
+    )
+    return "\n".join(lines)
+
+
+# =========================
+# 3. analyze 서브커맨드
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py analyze",
+        description="렌더링/OCR 없이 PDF들을 훑어 페이지별 처리 경로와 예상 소요 시간을 보여줍니다.",
+    )
+    parser.add_argument("paths", nargs="+", help="PDF 파일 또는 폴더(하위 *.pdf 포함)")
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help=f"예상 시간 계산에 쓸 OCR 프로파일 (기본: {DEFAULT_PROFILE})",
+    )
+    parser.add_argument("-j", "--workers", type=int, default=1, help="병렬 worker 수 (예상 시간을 나눔)")
+    parser.add_argument("--pages", action="store_true", help="페이지별 경로/이미지 정보도 출력")
+    args = parser.parse_args(argv)
+
+    throughput = load_throughput()
+    reports = []
+    start = time.perf_counter()
+
+    for path in iter_pdf_paths(args.paths):
+        try:
+            reports.append(analyze_pdf(path, profile=args.profile, throughput=throughput))
+        except (OSError, RuntimeError) as e:
+            print(f"[WARN] 분석 실패, 건너뜀: {path} ({e})", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    page_total = sum(r["page_count"] for r in reports)
+
+    print(format_report(reports, workers=max(1, args.workers), show_pages=args.pages))
+
+    if not all(r["measured"] for r in reports):
+        print(f"[INFO] '{args.profile}' 처리 속도 기록이 없어 일부 기본값으로 예상했습니다. "
+              f"실제 추출/bench를 한 번 실행하면 보정됩니다.", file=sys.stderr)
+    if elapsed > 0:
+        print(f"[INFO] 분석 {page_total}페이지, {elapsed:.2f}초 ({page_total / elapsed:.0f}페이지/초)",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+from pdf_text_ocr import DEFAULT_PROFILE, extract_pages, load_pdf_source, pdf_sha256
+
+# =========================
+# 0. 색인 스키마
+# =========================
+# documents : 문서(파일 해시) 단위 메타데이터
+# pages     : 페이지별 텍스트 FTS5 테이블 (sha256 + page 로 식별)
+#
+# 한글은 조사/어미가 붙어 단어 단위 토큰화로는 잘 안 걸리므로
+# 가능하면 trigram 토크나이저(부분 문자열 검색)를 사용한다.
+SCHEMA_DOCUMENTS = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256      TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    page_count  INTEGER NOT NULL,
+    indexed_at  REAL NOT NULL
+)
+"""
+
+SCHEMA_PAGES = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    sha256 UNINDEXED,
+    page UNINDEXED,
+    route UNINDEXED,
+    confidence UNINDEXED,
+    tokenize = '{tokenizer}'
+)
+"""
+
+# trigram 토크나이저가 검색할 수 있는 최소 글자 수
+TRIGRAM_MIN_CHARS = 3
+
+# stdin으로 들어온 문서의 경로 표시 (--name 없이 들어온 경우)
+# 여러 문서가 같은 이름을 쓰므로 이 이름으로는 이전 버전 교체를 하지 않는다
+STDIN_NAME = "<stdin>"
+
+
+def _has_trigram(conn) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def open_index(db_path: str) -> sqlite3.Connection:
+    """색인 DB를 열고(없으면 생성) 스키마를 준비한다."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA_DOCUMENTS)
+    conn.execute("CREATE INDEX IF NOT EXISTS documents_path ON documents(path)")
+
+    tokenizer = "trigram" if _has_trigram(conn) else "unicode61"
+    conn.execute(SCHEMA_PAGES.format(tokenizer=tokenizer))
+    conn.commit()
+    return conn
+
+
+def _uses_trigram(conn) -> bool:
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'pages'"
+    ).fetchone()
+    return bool(row) and "trigram" in row[0]
+
+
+# =========================
+# 1. 색인 쓰기 / 읽기
+# =========================
+def is_indexed(conn, sha256: str) -> bool:
+    row = conn.execute("SELECT 1 FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+    return row is not None
+
+
+def load_pages(conn, sha256: str) -> list:
+    """색인에 저장된 페이지 결과를 extract_pages()와 같은 형식으로 반환"""
+    rows = conn.execute(
+        "SELECT page, text, route, confidence FROM pages WHERE sha256 = ? ORDER BY page",
+        (sha256,),
+    ).fetchall()
+    return [
+        {"page": page, "text": text, "route": route, "confidence": confidence}
+        for page, text, route, confidence in rows
+    ]
+
+
+def _delete_document(conn, sha256: str):
+    conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+    conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+
+
+def index_document(conn, sha256: str, path: str, results: list):
+    """
+    문서 한 개의 페이지 결과를 색인에 저장.
+    같은 경로에 예전 내용(다른 해시)이 있으면 함께 교체한다.
+    (STDIN_NAME 문서는 서로 다른 문서이므로 교체하지 않는다)
+    """
+    with conn:
+        if path != STDIN_NAME:
+            stale = conn.execute(
+                "SELECT sha256 FROM documents WHERE path = ? AND sha256 != ?",
+                (path, sha256),
+            ).fetchall()
+            for (old_sha,) in stale:
+                _delete_document(conn, old_sha)
+
+        _delete_document(conn, sha256)
+        conn.executemany(
+            "INSERT INTO pages (text, sha256, page, route, confidence) VALUES (?, ?, ?, ?, ?)",
+            [
+                (r["text"], sha256, r["page"], r["route"], r["confidence"])
+                for r in results
+            ],
+        )
+        conn.execute(
+            "INSERT INTO documents (sha256, path, page_count, indexed_at) VALUES (?, ?, ?, ?)",
+            (sha256, path, len(results), time.time()),
+        )
+
+
+def extract_with_index(
+    db_path: str, source, path: str, lang: str = "kor", profile: str = DEFAULT_PROFILE,
+    jobs: int = 1, keep_words: bool = False,
+) -> list:
+    """
+    색인을 거쳐 페이지 결과를 얻는다.
+    - 같은 해시가 이미 색인돼 있으면 추출 없이 색인에서 읽어온다.
+      (keep_words=True면 색인에 단어 box가 없으므로 다시 추출)
+    - 아니면 추출 후 색인에 저장(같은 경로의 이전 버전은 교체, STDIN_NAME 제외).
+    """
+    # file object는 해시와 추출에 같은 바이트를 쓰도록 한 번만 읽어둔다
+    source = load_pdf_source(source)
+    sha256 = pdf_sha256(source)
+    conn = open_index(db_path)
+    try:
+        if is_indexed(conn, sha256) and not keep_words:
+            if path != STDIN_NAME:
+                # 파일이 옮겨졌을 수 있으므로 경로만 갱신
+                with conn:
+                    conn.execute("UPDATE documents SET path = ? WHERE sha256 = ?", (path, sha256))
+            print(f"[INFO] 변경 없음, 색인 사용: {path}", file=sys.stderr)
+            return load_pages(conn, sha256)
+
+        results = extract_pages(source, lang=lang, profile=profile, jobs=jobs, keep_words=keep_words)
+        index_document(conn, sha256, path, results)
+        print(f"[INFO] 색인 저장: {path} ({len(results)}페이지)", file=sys.stderr)
+        return results
+    finally:
+        conn.close()
+
+
+# =========================
+# 2. 검색
+# =========================
+def _plain_snippet(text: str, query: str, width: int = 30) -> str:
+    pos = text.find(query)
+    if pos < 0:
+        return text[: width * 2]
+    start = max(0, pos - width)
+    end = min(len(text), pos + len(query) + width)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return (
+        prefix + text[start:pos] + "[" + query + "]"
+        + text[pos + len(query):end] + suffix
+    )
+
+
+def search(conn, query: str, limit: int = 20) -> list:
+    """
+    (path, page, route, confidence, snippet) 목록을 관련도 순으로 반환.
+    query는 하나의 구(phrase)로 검색한다.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    if _uses_trigram(conn) and len(query) < TRIGRAM_MIN_CHARS:
+        # trigram은 3글자 미만을 MATCH(LIKE 포함)로 찾을 수 없으므로 전체 스캔
+        rows = conn.execute(
+            "SELECT d.path, p.page, p.route, p.confidence, p.text "
+            "FROM pages p JOIN documents d ON d.sha256 = p.sha256 "
+            "WHERE instr(p.text, ?) > 0 ORDER BY d.path, p.page LIMIT ?",
+            (query, limit),
+        ).fetchall()
+        return [
+            (path, page, route, confidence, _plain_snippet(text, query))
+            for path, page, route, confidence, text in rows
+        ]
+
+    phrase = '"' + query.replace('"', '""') + '"'
+    return conn.execute(
+        "SELECT d.path, p.page, p.route, p.confidence, "
+        "snippet(pages, 0, '[', ']', '…', 16) "
+        "FROM pages p JOIN documents d ON d.sha256 = p.sha256 "
+        "WHERE pages MATCH ? ORDER BY rank LIMIT ?",
+        (phrase, limit),
+    ).fetchall()
+
+
+# =========================
+# 3. search 서브커맨드
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py search",
+        description="--index 로 만든 색인에서 문서/페이지를 검색합니다.",
+    )
+    parser.add_argument("db", help="색인 DB 파일")
+    parser.add_argument("query", help="검색어")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="최대 결과 수 (기본 20)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] 색인 파일을 찾을 수 없습니다: {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = open_index(args.db)
+    try:
+        start = time.perf_counter()
+        rows = search(conn, args.query, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+
+    for path, page, route, confidence, snippet in rows:
+        snippet = " ".join(snippet.split())
+        if confidence is not None:
+            route = f"{route}({confidence:.0f})"
+        print(f"{path}\t{page}페이지\t{route}\t{snippet}")
+
+    print(f"[INFO] {len(rows)}건 ({elapsed_ms:.1f}ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1323 @@
+import os
+import sys
+import io
+import mmap
+import hashlib
+import json
+import stat
+import time
+import platform
+import re
+import bisect
+import fitz                   # PyMuPDF
+import pytesseract
+from pytesseract import Output
+from PIL import Image, ImageOps, ImageStat
+
+# =========================
+# 0. OCR 프로파일 (속도 / 정확도)
+# =========================
+# tessdata  : 사용할 traineddata 폴더 이름 (None이면 Tesseract 기본 tessdata)
+#             프로그램(exe) 폴더 또는 이 스크립트 폴더 아래에서 찾는다.
+#             폴더 안에 kor.traineddata 필요
+# dpi       : 렌더링 해상도
+# psm / oem : Tesseract 페이지 분할 모드 / 엔진 모드
+# binarize  : 이진화 threshold (None이면 grayscale + autocontrast 까지만)
+# extra     : 추가 Tesseract 옵션
+# reocr_threshold : 줄 평균 신뢰도가 이 값보다 낮으면 그 줄만 다른 설정으로 재인식
+#                   (None이면 재인식 안 함)
+#
+# tessdata_best(LSTM float) 모델은 tessdata_fast보다 몇 배 느리다.
+PROFILES = {
+    "fast": {
+        "tessdata": "tessdata_fast",
+        "dpi": 300,
+        "psm": 4,
+        "oem": 1,
+        "binarize": None,
+        "extra": "-c preserve_interword_spaces=1",
+        "reocr_threshold": 60,
+    },
+    "balanced": {
+        "tessdata": "tessdata_fast",
+        "dpi": 400,
+        "psm": 4,
+        "oem": 1,
+        "binarize": None,
+        "extra": "-c preserve_interword_spaces=1",
+        "reocr_threshold": 60,
+    },
+    "best": {
+        "tessdata": "tessdata_best",
+        "dpi": 400,
+        "psm": 4,
+        "oem": 1,
+        "binarize": None,
+        "extra": "-c preserve_interword_spaces=1",
+        "reocr_threshold": 60,
+    },
+    # GUI 기존 설정: 일반 문단(psm 6) + 단순 이진화
+    "binarized": {
+        "tessdata": None,
+        "dpi": 400,
+        "psm": 6,
+        "oem": 1,
+        "binarize": 180,
+        "extra": "",
+        "reocr_threshold": 60,
+    },
+}
+
+DEFAULT_PROFILE = "best"
+
+# 사용자가 미리 지정해 둔 TESSDATA_PREFIX (프로파일 tessdata가 없을 때 사용)
+_USER_TESSDATA_PREFIX = os.environ.get("TESSDATA_PREFIX")
+
+_warned_tessdata = set()
+
+
+def get_profile(name: str) -> dict:
+    if name not in PROFILES:
+        raise ValueError(
+            f"알 수 없는 프로파일입니다: {name} (사용 가능: {', '.join(PROFILES)})"
+        )
+    return PROFILES[name]
+
+
+def app_base_dir() -> str:
+    """PyInstaller나 exe 기준 base_dir (그냥 .py 실행이면 스크립트 위치)"""
+    return getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.argv[0])))
+
+
+def resolve_tessdata_dir(name):
+    """프로파일의 tessdata 폴더 이름을 실제 경로로 바꾼다. 못 찾으면 None."""
+    if not name:
+        return None
+
+    for root in (app_base_dir(), os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            return path
+
+    if name not in _warned_tessdata:
+        _warned_tessdata.add(name)
+        print(f"[WARN] {name} 폴더를 찾지 못했습니다. 기본 tessdata를 사용합니다.", file=sys.stderr)
+    return None
+
+
+def apply_tessdata(profile: dict):
+    """프로파일의 tessdata 폴더를 TESSDATA_PREFIX로 설정 (tesseract 하위 프로세스가 상속)"""
+    path = resolve_tessdata_dir(profile["tessdata"]) or _USER_TESSDATA_PREFIX
+    if path:
+        os.environ["TESSDATA_PREFIX"] = path
+    else:
+        os.environ.pop("TESSDATA_PREFIX", None)
+
+
+def tesseract_config(profile: dict) -> str:
+    config = f"--psm {profile['psm']} --oem {profile['oem']}"
+    if profile["extra"]:
+        config += " " + profile["extra"]
+    return config
+
+# =========================
+# 헬퍼함수 추가
+# =========================
+def force_heads_to_newline(text: str) -> str:
+    """
+    본문 안에 섞여 있는 머리표들(1. / (1) / (가) / 가. / *) 앞에
+    강제로 줄바꿈(\n)을 넣어, 항상 줄 맨 앞에 오도록 만든다.
+    """
+    patterns = [
+        r'\s+(\(\d+\))',      # ... (1)
+        r'\s+(\([가-힣]\))',  # ... (가)
+        r'\s+([가-힣]\.)',    # ... 가.
+        r'\s+(\d+\.)',        # ... 1.
+        r'\s+(\*)',           # ... *
+    ]
+    for pat in patterns:
+        text = re.sub(pat, r'\n\1', text)
+    return text
+
+# =========================
+# 노이즈 지우기
+# =========================
+def clean_noise(text: str) -> str:
+    """
+    OCR 및 PDF 텍스트에서 공통으로 노이즈 제거:
+    - '|' 제거
+    - 영문 알파벳(A~Z, a~z) 제거
+    """
+    # 1) '|' 완전 제거
+    text = text.replace("|", "")
+
+    # 2) 영문 알파벳 제거
+    text = re.sub(r'[A-Za-z]+', ' ', text)
+
+    return text
+
+# =========================
+# 1. Tesseract 실행 파일 경로 설정
+# =========================
+def init_tesseract_path():
+    system = platform.system()
+
+    # PyInstaller나 exe 기준 base_dir
+    base_dir = app_base_dir()
+
+    # 1) exe 옆 tesseract 폴더 우선
+    bundled_tesseract = os.path.join(base_dir, "tesseract", "tesseract.exe")
+    if os.path.exists(bundled_tesseract):
+        pytesseract.pytesseract.tesseract_cmd = bundled_tesseract
+        print(f"[INFO] 번들된 Tesseract 사용: {bundled_tesseract}", file=sys.stderr)
+        return
+
+    # 2) OS별 후보 경로
+    if system == "Windows":
+        candidates = [
+            r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+            r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+        ]
+    elif system == "Darwin":  # macOS
+        candidates = [
+            "/opt/homebrew/bin/tesseract",
+            "/usr/local/bin/tesseract",
+        ]
+    else:  # Linux 등
+        candidates = ["tesseract"]
+
+    for path in candidates:
+        if path == "tesseract" or os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            print(f"[INFO] Tesseract 경로 설정: {path}", file=sys.stderr)
+            return
+
+    print("[WARN] Tesseract 실행 파일을 찾지 못했습니다. PATH에 있는 tesseract를 사용합니다.", file=sys.stderr)
+
+
+init_tesseract_path()
+
+
+# =========================
+# 2. 문단 머리표 패턴 정의
+# =========================
+HEAD_PATTERNS = [
+    re.compile(r'^\s*\d+\.'),        # 1. 2. 3. ...
+    re.compile(r'^\s*\(\d+\)'),      # (1) (2) ...
+    re.compile(r'^\s*\([가-힣]\)'),   # (가) (나) ...
+    re.compile(r'^\s*[가-힣]\.'),     # 가. 나. ...
+    re.compile(r'^\s*\*'),           # * 항목
+]
+
+
+EXCEPTION_HEADS = [
+    re.compile(r'^\s*\(연령\)'),  
+    # 필요하면 더 추가 가능
+]
+
+def is_paragraph_head(line: str) -> bool:
+    for ex in EXCEPTION_HEADS:
+        if ex.match(line):
+            return False
+    for pat in HEAD_PATTERNS:
+        if pat.match(line):
+            return True
+    return False
+
+
+# =========================
+# 3. PDF 내 텍스트 블록 추출
+# =========================
+def extract_text_blocks(page, min_chars: int = 30) -> str:
+    """
+    PDF 페이지에서 selectable text가 존재할 때 사용하는 경로.
+    '|' 문자는 테이블 윤곽/셀 구분에 쓰이는 경우가 많으므로
+    그냥 삭제해버린다.
+    """
+    blocks = page.get_text("blocks")
+    if not blocks:
+        return ""
+
+    # (x0,y0,x1,y1, text, block_no, block_type, block_flags, ...)
+    blocks = sorted(blocks, key=lambda b: (b[1], b[0]))
+
+    paragraphs = []
+    for block in blocks:
+        text = block[4]
+        if not text:
+            continue
+
+        # 공통 노이즈 제거 (|, 영어알파벳 삭제)
+        text = clean_noise(text.strip())
+
+        if text.strip():
+            paragraphs.append(text.strip())
+
+    if not paragraphs:
+        return ""
+
+    full_text = "\n\n".join(paragraphs).strip()
+
+    # 너무 짧으면(노이즈 수준) 무시하고 OCR로 넘기기
+    if len(full_text) < min_chars:
+        return ""
+
+    return full_text
+
+
+# =========================
+# 4. OCR 결과 문단 정규화
+# =========================
+def normalize_paragraphs(raw_text: str) -> str:
+    """
+    OCR 결과처럼 줄 단위로 끊긴 텍스트를 문단 단위로 재구성하는 함수.
+
+    - '|' 문자는 테이블 구분용이므로 그냥 삭제
+    - 빈 줄(공백만 있는 줄)은 문단 구분으로 사용
+    - 그 외 줄들은 기본적으로 이전 줄과 이어붙임
+    """
+    # '|' + 영어 알파벳 등 노이즈 제거
+    cleaned = clean_noise(raw_text)
+    lines = [line.rstrip() for line in cleaned.splitlines()]
+
+    paragraphs = []
+    buffer = ""
+
+    for line in lines:
+        stripped = line.strip()
+
+        # 1) 완전 빈 줄이면 → 문단 끝
+        if not stripped:
+            if buffer:
+                paragraphs.append(buffer.strip())
+                buffer = ""
+            continue
+
+        # 2) 내용 있는 줄
+        if not buffer:
+            # 새 문단 시작
+            buffer = stripped
+        else:
+            # 이전 버퍼가 문장 부호로 끝나는지 확인
+            # (.,?!… 등 + 한글 문장 끝에 자주 오는 것들)
+            if buffer[-1] in ".?!…）)":
+                # 문장이 확실히 끝났으면 줄바꿈 후 이어붙이기
+                buffer = buffer + "\n" + stripped
+            else:
+                # 같은 문단 안에서 줄만 바뀐 거라고 보고 공백으로 이어붙임
+                buffer = buffer + " " + stripped
+
+    # 마지막 문단 처리
+    if buffer:
+        paragraphs.append(buffer.strip())
+
+    # 문단 사이를 빈 줄로 구분
+    return "\n\n".join(paragraphs)
+
+
+# =========================
+# 5. OCR 경로
+# =========================
+# 재인식할 약한 줄의 페이지당 최대 개수 (신뢰도가 낮은 줄부터)
+REOCR_MAX_LINES = 40
+
+# 재인식 결과는 원래 줄 글자 수(공백 제외)의 이 비율 이상을 읽었을 때만 채택
+# (신뢰도 낮은 단어를 빼먹어서 평균만 올라간 결과를 막기 위함)
+REOCR_MIN_CHAR_RATIO = 0.8
+
+# 재인식 설정 (시도 순서): 원래 전처리 / 2배 확대 / 다른 이진화
+REOCR_METHODS = ("crop", "upscale", "binarize")
+
+
+def render_page_gray(page, profile: dict) -> Image.Image:
+    """PDF 페이지를 프로파일 dpi로 렌더링 → Grayscale + autocontrast"""
+    pix = page.get_pixmap(dpi=profile["dpi"])
+    img_data = pix.tobytes("png")
+    img = Image.open(io.BytesIO(img_data))
+
+    # 그레이스케일 + 자동 대비
+    gray = img.convert("L")
+    gray = ImageOps.autocontrast(gray)
+    return gray
+
+
+def binarize_image(gray: Image.Image, threshold) -> Image.Image:
+    """단순 이진화 (threshold가 None이면 그대로)"""
+    if threshold is None:
+        return gray
+    return gray.point(lambda x: 0 if x < threshold else 255, "1")
+
+
+def render_page_image(page, profile: dict) -> Image.Image:
+    """
+    PDF 페이지를 프로파일 dpi로 렌더링하고 전처리한 이미지를 반환.
+    - Grayscale + autocontrast
+    - (binarize 설정 시) 단순 이진화
+    """
+    return binarize_image(render_page_gray(page, profile), profile["binarize"])
+
+
+def _ocr_words(image, lang: str, config: str, offset=(0, 0), scale: float = 1.0) -> list:
+    """
+    image_to_data 결과를 단어 목록으로 변환.
+    box는 (offset, scale)을 적용해 페이지 이미지 좌표로 되돌린다.
+    """
+    data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=Output.DICT)
+    words = []
+    for i, text in enumerate(data["text"]):
+        conf = data["conf"][i]
+        if conf < 0 or not text.strip():
+            continue
+        words.append({
+            "text": text.strip(),
+            "conf": float(conf),
+            "box": (
+                offset[0] + data["left"][i] / scale,
+                offset[1] + data["top"][i] / scale,
+                offset[0] + (data["left"][i] + data["width"][i]) / scale,
+                offset[1] + (data["top"][i] + data["height"][i]) / scale,
+            ),
+            "key": (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+        })
+    return words
+
+
+def _mean_conf(words) -> float:
+    return sum(w["conf"] for w in words) / len(words) if words else 0.0
+
+
+def _char_count(words) -> int:
+    return sum(len(w["text"]) for w in words)
+
+
+def _reocr_strip(crop: Image.Image, method: str, settings: dict):
+    """재인식 설정에 맞게 줄 이미지를 전처리 → (이미지, 확대 배율)"""
+    if method == "upscale":
+        crop = crop.resize((crop.width * 2, crop.height * 2), Image.LANCZOS)
+        return binarize_image(crop, settings["binarize"]), 2.0
+    if method == "binarize":
+        if settings["binarize"] is None:
+            # 원래 이진화를 안 했으면 줄 영역 평균 밝기 기준 이진화 시도
+            return binarize_image(crop, int(ImageStat.Stat(crop).mean[0])), 1.0
+        # 원래 이진화를 했으면 grayscale 그대로 시도
+        return crop, 1.0
+    return binarize_image(crop, settings["binarize"]), 1.0
+
+
+def _stack_strips(strips):
+    """
+    줄 이미지들을 흰 여백을 두고 세로로 쌓은 이미지 한 장과 각 줄의 top 좌표를 반환.
+    여백은 Tesseract가 두 줄을 한 줄로 묶지 않을 만큼 둔다.
+    """
+    gap = max(20, max(img.height for img in strips) // 2)
+    width = max(img.width for img in strips) + gap * 2
+    height = sum(img.height for img in strips) + gap * (len(strips) + 1)
+
+    canvas = Image.new("L", (width, height), 255)
+    tops = []
+    y = gap
+    for img in strips:
+        canvas.paste(img.convert("L"), (gap, y))
+        tops.append(y)
+        y += img.height + gap
+    return canvas, tops, gap
+
+
+def _reocr_lines(gray: Image.Image, lines: list, lang: str, settings: dict) -> dict:
+    """
+    약한 줄들을 다시 인식해서 나아진 줄의 words / conf를 바꾼다.
+    줄 영역을 잘라 설정(REOCR_METHODS)마다 한 장에 세로로 쌓아 한 번씩만 인식하므로
+    Tesseract 호출은 페이지당 설정 수만큼이다. 이미 reocr_threshold를 넘긴 줄은
+    다음 설정에서 빼고, 모두 넘기면 남은 설정은 건너뛴다.
+    쌓은 이미지는 여러 줄이라 줄 단위 psm 7은 쓸 수 없으므로, 페이지 인식과 다른
+    페이지 분할(psm 4 <-> 6)로 읽는다.
+    {"improved": 개선된 줄 수, "calls": Tesseract 호출 수}를 반환.
+    """
+    threshold = settings["reocr_threshold"]
+    psm = 4 if settings["psm"] == 6 else 6
+    config = f"--psm {psm} --oem {settings['oem']}"
+
+    crops = []
+    for line in lines:
+        x0, y0, x1, y1 = line["box"]
+        pad = max(4, int((y1 - y0) * 0.2))
+        left = max(0, int(x0) - pad)
+        top = max(0, int(y0) - pad)
+        box = (left, top, min(gray.width, int(x1) + pad), min(gray.height, int(y1) + pad))
+        crops.append((gray.crop(box), left, top))
+
+    improved = set()
+    calls = 0
+    for method in REOCR_METHODS:
+        todo = [i for i, line in enumerate(lines) if line["conf"] < threshold]
+        if not todo:
+            break
+
+        prepared = [_reocr_strip(crops[i][0], method, settings) for i in todo]
+        canvas, tops, gap = _stack_strips([img for img, _ in prepared])
+        words = _ocr_words(canvas, lang, config)
+        calls += 1
+
+        # 단어 세로 중심이 들어가는 줄로 나누고, 원래 페이지 좌표로 되돌린다
+        by_strip = {}
+        for w in words:
+            center = (w["box"][1] + w["box"][3]) / 2
+            k = bisect.bisect_right(tops, center) - 1
+            if k < 0 or center > tops[k] + prepared[k][0].height + gap / 2:
+                continue
+            _, left, top = crops[todo[k]]
+            scale = prepared[k][1]
+            x0, y0, x1, y1 = w["box"]
+            w["box"] = (
+                left + (x0 - gap) / scale,
+                top + (y0 - tops[k]) / scale,
+                left + (x1 - gap) / scale,
+                top + (y1 - tops[k]) / scale,
+            )
+            by_strip.setdefault(k, []).append(w)
+
+        for k, i in enumerate(todo):
+            line = lines[i]
+            candidate = by_strip.get(k)
+            if not candidate:
+                continue
+            conf = _mean_conf(candidate)
+            if conf <= line["conf"]:
+                continue
+            if _char_count(candidate) < _char_count(line["words"]) * REOCR_MIN_CHAR_RATIO:
+                continue
+            for w in candidate:
+                w["key"] = line["key"]
+            line["words"] = candidate
+            line["conf"] = conf
+            improved.add(i)
+
+    return {"improved": len(improved), "calls": calls}
+
+
+def ocr_page_data(page, lang: str = "kor", profile: str = DEFAULT_PROFILE) -> dict:
+    """PDF 페이지를 렌더링해서 ocr_image_data()로 OCR"""
+    settings = get_profile(profile)
+    return ocr_image_data(render_page_gray(page, settings), lang=lang, profile=profile)
+
+
+def ocr_image_data(gray: Image.Image, lang: str = "kor", profile: str = DEFAULT_PROFILE) -> dict:
+    """
+    렌더링된 grayscale 페이지 이미지를 OCR해서 텍스트와 신뢰도 정보를 반환.
+    - raw_text   : 줄/문단 구조를 살린 OCR 텍스트 (문단 정규화 전)
+    - confidence : 단어 신뢰도 평균 (0~100, 단어가 없으면 None)
+    - words      : 단어 목록 (text, conf, box: 렌더링 이미지 픽셀 좌표)
+    - dpi        : 렌더링 해상도 (box 좌표 변환용)
+    - stats      : 단어/줄 수, 약한 줄 수, 재인식으로 개선된 줄 수, 재인식 Tesseract 호출 수
+
+    줄 평균 신뢰도가 프로파일 reocr_threshold 미만인 줄은
+    이미 렌더링한 이미지에서 그 영역만 잘라 다른 설정으로 다시 인식하고,
+    글자 수가 크게 줄지 않으면서 신뢰도가 더 높은 결과를 쓴다 (_reocr_lines 참고).
+    """
+    settings = get_profile(profile)
+
+    apply_tessdata(settings)
+    words = _ocr_words(binarize_image(gray, settings["binarize"]), lang, tesseract_config(settings))
+
+    # (block, par, line) 단위로 줄 묶기 (Tesseract 출력 순서 유지)
+    lines = {}
+    for word in words:
+        lines.setdefault(word["key"], []).append(word)
+
+    line_list = []
+    for key, line_words in lines.items():
+        line_list.append({
+            "key": key,
+            "words": line_words,
+            "conf": _mean_conf(line_words),
+            "box": (
+                min(w["box"][0] for w in line_words),
+                min(w["box"][1] for w in line_words),
+                max(w["box"][2] for w in line_words),
+                max(w["box"][3] for w in line_words),
+            ),
+        })
+
+    threshold = settings["reocr_threshold"]
+    weak = []
+    if threshold is not None:
+        weak = sorted((ln for ln in line_list if ln["conf"] < threshold), key=lambda ln: ln["conf"])
+
+    reocr = {"improved": 0, "calls": 0}
+    if weak:
+        reocr = _reocr_lines(gray, weak[:REOCR_MAX_LINES], lang, settings)
+
+    # 줄은 줄바꿈, 문단(block/par)이 바뀌면 빈 줄
+    text_lines = []
+    prev_par = None
+    for line in line_list:
+        par = line["key"][:2]
+        if prev_par is not None and par != prev_par:
+            text_lines.append("")
+        text_lines.append(" ".join(w["text"] for w in line["words"]))
+        prev_par = par
+
+    final_words = [w for line in line_list for w in line["words"]]
+
+    return {
+        "raw_text": "\n".join(text_lines),
+        "confidence": _mean_conf(final_words) if final_words else None,
+        "words": final_words,
+        "dpi": settings["dpi"],
+        "stats": {
+            "words": len(final_words),
+            "lines": len(line_list),
+            "weak_lines": len(weak),
+            "improved_lines": reocr["improved"],
+            "reocr_calls": reocr["calls"],
+        },
+    }
+
+
+def ocr_page(page, lang: str = "kor", profile: str = DEFAULT_PROFILE) -> str:
+    """
+    PDF 페이지를 이미지로 렌더링한 뒤 Tesseract로 OCR 수행.
+    dpi / 전처리 / psm / oem / tessdata 는 프로파일(PROFILES)에서 가져온다.
+    신뢰도 정보가 필요하면 ocr_page_data() 사용.
+    """
+    # 언어는 오직 kor만 사용
+    lang_for_tess = "kor"
+
+    data = ocr_page_data(page, lang=lang_for_tess, profile=profile)
+
+    # 줄 단위 결과를 문단 단위로 재구성
+    normalized = normalize_paragraphs(data["raw_text"])
+    return normalized
+
+
+# =========================
+# 5-1. OCR 텍스트 레이어 (검색 가능한 PDF)
+# =========================
+# OCR 결과를 보이지 않는 텍스트(render mode 3)로 원본 PDF 사본에 덮어 써 두면
+# 다음 실행부터는 OCR 없이 텍스트 레이어에서 바로 읽을 수 있다.
+# 이 도구가 쓴 레이어는 페이지의 /PieceInfo/PdfTextOcr 항목으로 표시한다.
+OCR_LAYER_KEY = "PieceInfo/PdfTextOcr"
+OCR_LAYER_VERSION = 1
+
+# 한글 단어 배치용 내장 CJK 폰트
+_layer_font = None
+
+
+def _get_layer_font():
+    global _layer_font
+    if _layer_font is None:
+        _layer_font = fitz.Font("korea")
+    return _layer_font
+
+
+def words_to_points(words, dpi: int) -> list:
+    """OCR 단어 box(렌더링 픽셀 좌표)를 PDF 좌표(pt)로 변환 (줄 key는 유지)"""
+    scale = 72 / dpi
+    return [
+        {"text": w["text"], "box": tuple(v * scale for v in w["box"]), "key": tuple(w["key"])}
+        for w in words
+    ]
+
+
+def has_ocr_layer(page) -> bool:
+    kind, _ = page.parent.xref_get_key(page.xref, OCR_LAYER_KEY + "/Private/Version")
+    return kind != "null"
+
+
+def ocr_layer_confidence(page):
+    kind, value = page.parent.xref_get_key(page.xref, OCR_LAYER_KEY + "/Private/Confidence")
+    if kind not in ("int", "float"):
+        return None
+    return float(value)
+
+
+def extract_ocr_layer(page) -> str:
+    """
+    이 도구가 쓴 OCR 레이어에서 텍스트를 읽는다.
+    글자 수 기준 없이 그대로 신뢰한다. MuPDF의 블록 묶음 대신
+    레이어 폰트로 쓴 줄을 쓴 순서대로 모으고, 표시에 저장해 둔 문단 경계를 넣어
+    OCR 경로와 같은 문단 정규화를 적용한다.
+    """
+    font_name = _get_layer_font().name
+    lines = []
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            spans = [span for span in line["spans"] if span["font"].endswith(font_name)]
+            if spans:
+                lines.append("".join(span["text"] for span in spans))
+
+    kind, value = page.parent.xref_get_key(page.xref, OCR_LAYER_KEY + "/Private/Breaks")
+    breaks = {int(v) for v in value.strip("[]").split()} if kind == "array" else set()
+
+    raw_lines = []
+    for i, line in enumerate(lines):
+        if i in breaks:
+            raw_lines.append("")
+        raw_lines.append(line)
+
+    return normalize_paragraphs("\n".join(raw_lines))
+
+
+def add_ocr_layer(page, words, confidence=None, profile: str = DEFAULT_PROFILE):
+    """
+    OCR 단어(PDF 좌표)를 보이지 않는 텍스트로 페이지에 쓰고 레이어 표시를 남긴다.
+    OCR 줄 단위로 한 번에 쓰고, 줄 폭에 맞게 글자 크기를 정해
+    드래그/검색 위치가 원본 글자와 대략 맞도록 한다.
+    (단어마다 따로 쓰면 글자 크기가 제각각이라 다시 읽을 때 줄이 쪼개진다)
+    회전된 페이지도 화면 기준 좌표 그대로 쓰면 TextWriter가 변환한다.
+    """
+    font = _get_layer_font()
+    writer = fitz.TextWriter(page.rect)
+
+    lines = {}
+    for word in words:
+        lines.setdefault(tuple(word["key"]), []).append(word)
+
+    # 문단(block, par)이 바뀌는 줄 번호 (다시 읽을 때 빈 줄을 넣을 위치)
+    breaks = []
+    written = 0
+    prev_par = None
+
+    for key, line_words in lines.items():
+        text = " ".join(w["text"] for w in line_words)
+        x0 = min(w["box"][0] for w in line_words)
+        y0 = min(w["box"][1] for w in line_words)
+        x1 = max(w["box"][2] for w in line_words)
+        y1 = max(w["box"][3] for w in line_words)
+        height = y1 - y0
+        unit_width = font.text_length(text, fontsize=1)
+        if height <= 0 or unit_width <= 0:
+            continue
+        fontsize = min((x1 - x0) / unit_width, height * 1.2)
+        # 줄 box 아래쪽에서 살짝 올린 위치를 기준선으로
+        writer.append((x0, y1 - height * 0.2), text, font=font, fontsize=fontsize)
+
+        if prev_par is not None and key[:2] != prev_par:
+            breaks.append(written)
+        prev_par = key[:2]
+        written += 1
+
+    if written:
+        writer.write_text(page, render_mode=3)
+
+    private = f"/Version {OCR_LAYER_VERSION} /Profile ({profile}) /Breaks [{' '.join(map(str, breaks))}]"
+    if confidence is not None:
+        private += f" /Confidence {confidence:.1f}"
+    # /PieceInfo 전체가 아니라 우리 항목만 써서 다른 프로그램(/Illustrator 등)의 항목은 남긴다
+    page.parent.xref_set_key(
+        page.xref, OCR_LAYER_KEY,
+        f"<</LastModified (D:{time.strftime('%Y%m%d%H%M%S')}) /Private <<{private}>> >>",
+    )
+
+
+# =========================
+# 6. 머리표 기준 문단 분해
+# =========================
+def split_paragraphs_by_heads(full_text: str) -> str:
+    """
+    전체 텍스트를 줄 단위로 보면서
+    1. / (1) / (가) / 가. / * 로 시작하는 줄을
+    '새 문단의 머리표'로 보고 문단을 나누는 함수.
+    """
+    # 0) 줄 중간에 끼어 있는 머리표도 강제로 줄바꿈
+    full_text = force_heads_to_newline(full_text)
+
+    lines = full_text.splitlines()
+
+    paragraphs = []
+    current = []
+
+    for line in lines:
+        # 혹시 남아 있을지 모르는 '|' + 영어 노이즈 제거
+        line = clean_noise(line)
+        stripped = line.rstrip()
+
+        # 빈 줄이면 문단 종료
+        if not stripped:
+            if current:
+                paragraphs.append("\n".join(current).strip())
+                current = []
+            continue
+
+        # 머리표인지 확인 (앞쪽 공백 제거 후 판별)
+        head_candidate = stripped.lstrip()
+
+        if is_paragraph_head(head_candidate):
+            # 이전 문단 마감
+            if current:
+                paragraphs.append("\n".join(current).strip())
+                current = []
+            # 새 문단 시작: 머리표가 있는 줄을 첫 줄로
+            current.append(head_candidate)
+        else:
+            # 기존 문단에 이어붙임
+            current.append(stripped)
+
+    # 마지막 문단 처리
+    if current:
+        paragraphs.append("\n".join(current).strip())
+
+    # 문단 사이에 빈 줄 하나씩
+    return "\n\n".join(paragraphs)
+
+
+# =========================
+# 7. PDF 입력 열기
+# =========================
+def _mmap_file(fobj):
+    """
+    실제 디스크 파일에 연결된 file object라면 read-only mmap으로 연다.
+    파이프/소켓/일반 스트림처럼 mmap이 불가능하면 None.
+    """
+    try:
+        fd = fobj.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+    try:
+        st = os.fstat(fd)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return None
+
+    return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+
+
+def load_pdf_source(source):
+    """
+    file object 입력을 여러 번 읽을 수 있는 버퍼로 바꾼다 (해시 + 추출처럼 두 번 쓸 때).
+    디스크 파일이면 read-only mmap, 파이프(stdin 등)면 끝까지 read() 한 번.
+    경로, 메모리 버퍼, io.BytesIO 등 그 밖의 입력은 그대로 반환.
+    """
+    if isinstance(source, io.BytesIO) or not hasattr(source, "read"):
+        return source
+    mapped = _mmap_file(source)
+    return mapped if mapped is not None else source.read()
+
+
+def open_pdf(source) -> fitz.Document:
+    """
+    여러 형태의 PDF 입력을 fitz.Document로 연다.
+
+    - str / os.PathLike      : 파일 경로
+    - bytes / memoryview     : 그대로 fitz.open(stream=...)에 전달 (복사 없음)
+    - bytearray / mmap       : memoryview로 감싸서 전달 (복사 없음)
+    - io.BytesIO             : getbuffer()로 내부 버퍼를 그대로 전달
+    - 그 외 file object      : 디스크 파일이면 mmap, 아니면 read() 한 번
+    - fitz.Document          : 그대로 반환
+    """
+    if isinstance(source, fitz.Document):
+        return source
+
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+
+    if isinstance(source, (bytes, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+
+    if isinstance(source, (bytearray, mmap.mmap)):
+        return fitz.open(stream=memoryview(source), filetype="pdf")
+
+    if isinstance(source, io.BytesIO):
+        return fitz.open(stream=source.getbuffer(), filetype="pdf")
+
+    if hasattr(source, "read"):
+        return open_pdf(load_pdf_source(source))
+
+    raise TypeError(f"지원하지 않는 PDF 입력 형식입니다: {type(source).__name__}")
+
+
+def pdf_sha256(source) -> str:
+    """
+    PDF 원본 바이트의 sha256 (색인 키로 사용). 받는 입력은 open_pdf와 같다.
+    경로는 파일을 나눠 읽고, 메모리 버퍼는 그대로 해시한다.
+    file object는 open_pdf처럼 mmap 또는 read()로 읽으므로, 파이프라면 해시 후
+    다시 읽을 수 없다. 같은 입력을 추출에도 쓸 때는 먼저 load_pdf_source()로 바꿔 둔다.
+    """
+    h = hashlib.sha256()
+    if isinstance(source, fitz.Document):
+        if source.stream is None:
+            source = source.name
+        else:
+            source = source.stream
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    elif isinstance(source, io.BytesIO):
+        h.update(source.getbuffer())
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        h.update(memoryview(source))
+    elif hasattr(source, "read"):
+        h.update(memoryview(load_pdf_source(source)))
+    else:
+        raise TypeError(f"지원하지 않는 PDF 입력 형식입니다: {type(source).__name__}")
+    return h.hexdigest()
+
+
+# =========================
+# 8. PDF 전체 처리
+# =========================
+# 최근 처리 속도(페이지당 초)를 프로파일/경로별로 기록해 두고
+# analyze 모드의 예상 시간 계산에 사용한다.
+# 라이브러리 함수(extract_pages 등)는 기록하지 않고, CLI 추출/bench가 명시적으로 기록한다.
+THROUGHPUT_PATH = os.path.join(os.path.expanduser("~"), ".pdf_text_ocr", "throughput.json")
+THROUGHPUT_LOCK_PATH = THROUGHPUT_PATH + ".lock"
+
+# 새 측정값 반영 비율 (지수 이동 평균)
+THROUGHPUT_WEIGHT = 0.3
+
+# 기록 lock 대기 시간 / 이보다 오래된 lock 파일은 죽은 프로세스가 남긴 것으로 본다 (초)
+THROUGHPUT_LOCK_WAIT = 5.0
+THROUGHPUT_LOCK_STALE = 30.0
+
+
+def load_throughput() -> dict:
+    """{프로파일: {"text"|"ocr": {"sec_per_page", "pages", "updated"}}}"""
+    try:
+        with open(THROUGHPUT_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _lock_throughput() -> bool:
+    """lock 파일을 만들어 기록 권한을 얻는다 (O_EXCL이라 한 프로세스만 성공)."""
+    deadline = time.time() + THROUGHPUT_LOCK_WAIT
+    while True:
+        try:
+            os.close(os.open(THROUGHPUT_LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+
+        try:
+            if time.time() - os.path.getmtime(THROUGHPUT_LOCK_PATH) > THROUGHPUT_LOCK_STALE:
+                os.remove(THROUGHPUT_LOCK_PATH)
+                continue
+        except OSError:
+            # 그 사이 다른 프로세스가 lock을 풀었음
+            continue
+
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+
+
+def record_throughput(profile: str, seconds_by_route: dict, pages_by_route: dict):
+    """
+    경로별 처리 시간을 기록 (실패해도 추출에는 영향 없음).
+    여러 프로세스가 동시에 기록해도 서로의 갱신을 덮어쓰지 않도록 lock 파일 안에서 읽고 쓴다.
+    """
+    try:
+        os.makedirs(os.path.dirname(THROUGHPUT_PATH), exist_ok=True)
+        locked = _lock_throughput()
+    except OSError as e:
+        print(f"[WARN] 처리 속도 기록 실패: {e}", file=sys.stderr)
+        return
+    if not locked:
+        print("[WARN] 다른 프로세스가 처리 속도를 기록 중이라 이번 기록은 건너뜁니다.", file=sys.stderr)
+        return
+
+    try:
+        stats = load_throughput()
+        entry = stats.setdefault(profile, {})
+
+        for route, pages in pages_by_route.items():
+            if not pages:
+                continue
+            measured = seconds_by_route[route] / pages
+            old = entry.get(route)
+            if old:
+                measured = old["sec_per_page"] * (1 - THROUGHPUT_WEIGHT) + measured * THROUGHPUT_WEIGHT
+                pages += old["pages"]
+            entry[route] = {"sec_per_page": measured, "pages": pages, "updated": time.time()}
+
+        tmp_path = f"{THROUGHPUT_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp_path, THROUGHPUT_PATH)
+    except OSError as e:
+        print(f"[WARN] 처리 속도 기록 실패: {e}", file=sys.stderr)
+    finally:
+        try:
+            os.remove(THROUGHPUT_LOCK_PATH)
+        except OSError:
+            pass
+
+
+def record_results_throughput(profile: str, results):
+    """
+    extract_pages() 결과의 페이지별 처리 시간(seconds)을 경로별로 합쳐 기록.
+    색인에서 읽은 페이지처럼 seconds가 없는 결과는 세지 않는다.
+    OCR 레이어 페이지는 텍스트 경로와 같은 비용으로 본다.
+    """
+    seconds_by_route = {"text": 0.0, "ocr": 0.0}
+    pages_by_route = {"text": 0, "ocr": 0}
+
+    for result in results:
+        if result.get("seconds") is None:
+            continue
+        timing_route = "ocr" if result["route"] == "ocr" else "text"
+        seconds_by_route[timing_route] += result["seconds"]
+        pages_by_route[timing_route] += 1
+
+    if any(pages_by_route.values()):
+        record_throughput(profile, seconds_by_route, pages_by_route)
+
+
+# 경로별 진행 표시
+ROUTE_LABELS = {
+    "text": "텍스트",
+    "ocr-layer": "OCR 레이어",
+    "ocr": "OCR",
+}
+
+
+def route_page(page, text_extractor=extract_text_blocks):
+    """
+    OCR 없이 처리할 수 있는 페이지인지 판단.
+    (route, text, confidence)를 반환하고, OCR이 필요하면 route만 "ocr"이고 text는 None.
+    - ocr-layer : 이 도구가 쓴 OCR 레이어 → 글자 수와 상관없이 신뢰
+    - text      : 일반 텍스트 레이어 (text_extractor가 ""를 반환하면 OCR로)
+    """
+    if has_ocr_layer(page):
+        return "ocr-layer", extract_ocr_layer(page), ocr_layer_confidence(page)
+
+    # 1차: PDF 텍스트 추출
+    text = text_extractor(page)
+    if text:
+        return "text", text, None
+
+    return "ocr", None, None
+
+
+def extract_page(page, lang: str = "kor", profile: str = DEFAULT_PROFILE,
+                 keep_words: bool = False) -> dict:
+    """
+    한 페이지를 처리해서 페이지 결과(dict)를 반환.
+    - page       : 1부터 시작하는 페이지 번호
+    - text       : 추출된 텍스트
+    - route      : "text"(텍스트 레이어) / "ocr-layer"(이 도구의 OCR 레이어) / "ocr"
+    - confidence : OCR 단어 신뢰도 평균 (텍스트 경로면 None)
+    - ocr_stats  : OCR 줄/단어 통계 (OCR 경로가 아니면 None, ocr_page_data 참고)
+    - words      : (keep_words=True이고 OCR 경로일 때만) PDF 좌표 단어 목록
+    - seconds    : 이 페이지 처리에 걸린 시간(초, 처리 속도 기록용)
+    """
+    start = time.perf_counter()
+    route, text, confidence = route_page(page)
+    ocr_stats = None
+    words = None
+
+    if route == "ocr":
+        # 텍스트가 거의 없으면 OCR 사용 (언어는 오직 kor만 사용)
+        data = ocr_page_data(page, lang="kor", profile=profile)
+        text = normalize_paragraphs(data["raw_text"])
+        confidence = data["confidence"]
+        ocr_stats = data["stats"]
+        if keep_words:
+            words = words_to_points(data["words"], data["dpi"])
+
+    result = {
+        "page": page.number + 1,
+        "text": text,
+        "route": route,
+        "confidence": confidence,
+        "ocr_stats": ocr_stats,
+    }
+    if words is not None:
+        result["words"] = words
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def extract_pages(source, lang: str = "kor", profile: str = DEFAULT_PROFILE, jobs: int = 1,
+                  keep_words: bool = False) -> list:
+    """
+    source의 모든 페이지를 처리해서 페이지 결과 리스트를 반환.
+    source    : 경로, bytes, memoryview, mmap, file object 등 (open_pdf 참고)
+    jobs      : 2 이상이면 OCR을 worker 프로세스 여러 개로 처리 (pdf_text_shm 참고)
+    keep_words: OCR 페이지 결과에 단어 box 포함 (write_searchable_pdf 용)
+    처리 속도는 기록하지 않는다. 필요하면 결과를 record_results_throughput()에 넘긴다.
+    """
+    if jobs > 1:
+        import pdf_text_shm
+        return pdf_text_shm.extract_pages_parallel(
+            source, lang=lang, profile=profile, workers=jobs, keep_words=keep_words
+        )
+
+    doc = open_pdf(source)
+    results = []
+
+    for page_index in range(len(doc)):
+        result = extract_page(doc[page_index], lang=lang, profile=profile, keep_words=keep_words)
+        results.append(result)
+
+        mode = ROUTE_LABELS[result["route"]]
+        print(f"[INFO] {result['page']}/{len(doc)}페이지 처리 ({mode})", file=sys.stderr)
+
+    return results
+
+
+def summarize_confidence(results):
+    """
+    문서 단위 OCR 신뢰도 요약 (OCR 페이지가 없으면 None).
+    이 도구의 OCR 레이어에서 읽은 페이지(ocr-layer)도 저장된 신뢰도로 함께 센다.
+    약한 줄/개선 줄 통계는 이번에 OCR해서 ocr_stats가 있는 페이지에서만 센다
+    (색인/레이어에서 읽은 결과에는 없음). stats_pages가 그 페이지 수.
+    """
+    ocr_results = [r for r in results if r["route"] in ("ocr", "ocr-layer")]
+    if not ocr_results:
+        return None
+
+    scored = [r for r in ocr_results if r.get("confidence") is not None]
+    stats = [r["ocr_stats"] for r in ocr_results if r.get("ocr_stats")]
+    lowest = min(scored, key=lambda r: r["confidence"]) if scored else None
+
+    return {
+        "ocr_pages": len(ocr_results),
+        "layer_pages": sum(1 for r in ocr_results if r["route"] == "ocr-layer"),
+        "mean": sum(r["confidence"] for r in scored) / len(scored) if scored else None,
+        "min": lowest["confidence"] if lowest else None,
+        "min_page": lowest["page"] if lowest else None,
+        "stats_pages": len(stats),
+        "weak_lines": sum(s.get("weak_lines", 0) for s in stats),
+        "improved_lines": sum(s.get("improved_lines", 0) for s in stats),
+    }
+
+
+def format_confidence_summary(summary) -> str:
+    if summary is None:
+        return "OCR 페이지 없음"
+
+    pages = f"OCR {summary['ocr_pages']}페이지"
+    if summary.get("layer_pages"):
+        pages += f" (OCR 레이어 {summary['layer_pages']}페이지 포함)"
+
+    if summary["mean"] is None:
+        return f"{pages}, 인식된 단어 없음"
+
+    text = (
+        f"{pages}, 신뢰도 평균 {summary['mean']:.1f} / "
+        f"최저 {summary['min']:.1f} ({summary['min_page']}페이지)"
+    )
+    # 줄 통계는 이번에 OCR한 페이지에만 있다 (색인/레이어에서 읽은 페이지는 제외)
+    if summary.get("stats_pages"):
+        text += f", 약한 줄 {summary['weak_lines']}개 중 {summary['improved_lines']}개 재인식으로 개선"
+    return text
+
+
+def merge_pages(results) -> str:
+    """페이지 결과들을 최종 txt 본문으로 합친다."""
+    all_pages_text = []
+    for result in results:
+        header = f"-------- {result['page']}페이지 --------"
+        all_pages_text.append(header + "\n\n" + result["text"] + "\n")
+
+    # 1) 페이지별 텍스트를 하나로 합치기
+    full_text = "\n\n".join(all_pages_text).strip()
+
+    # 2) 문단 머리표(1. / (1) / (가) / 가. / *) 기준으로 다시 문단 분해
+    full_text = split_paragraphs_by_heads(full_text)
+
+    return full_text
+
+
+def extract_pdf_to_text(source, lang: str = "kor", profile: str = DEFAULT_PROFILE) -> str:
+    """
+    source : 경로, bytes, memoryview, mmap, file object 등 (open_pdf 참고)
+    profile: OCR 프로파일 이름 (PROFILES 참고)
+    """
+    return merge_pages(extract_pages(source, lang=lang, profile=profile))
+
+
+def _subset_font_program(chars: str):
+    """
+    레이어 폰트를 chars 글자만 남기도록 서브셋한 (폰트 파일 키, 폰트 프로그램, FontName).
+    원본 문서를 직렬화하지 않도록, 그 글자들만 쓴 작은 임시 문서에서 서브셋한다.
+    """
+    font = _get_layer_font()
+    per_line = 100
+    lines = [chars[i:i + per_line] for i in range(0, len(chars), per_line)] or [" "]
+
+    scratch = fitz.open()
+    try:
+        page = scratch.new_page(width=per_line * 12, height=(len(lines) + 1) * 12)
+        writer = fitz.TextWriter(page.rect)
+        for i, line in enumerate(lines):
+            writer.append((6, (i + 1) * 12), line, font=font, fontsize=10)
+        writer.write_text(page, render_mode=3)
+        scratch.subset_fonts()
+
+        for xref in range(1, scratch.xref_length()):
+            if scratch.xref_get_key(xref, "Type") != ("name", "/FontDescriptor"):
+                continue
+            for key in ("FontFile2", "FontFile3", "FontFile"):
+                kind, value = scratch.xref_get_key(xref, key)
+                if kind == "xref":
+                    program = scratch.xref_stream(int(value.split()[0]))
+                    return key, program, scratch.xref_get_key(xref, "FontName")[1]
+    finally:
+        scratch.close()
+    return None
+
+
+def _subset_layer_fonts(doc, first_new_xref: int, chars: str):
+    """
+    레이어를 쓰면서 새로 들어간 폰트(xref >= first_new_xref)만 서브셋한다.
+    doc.subset_fonts()는 원본에 원래 들어 있던 폰트까지 모두 서브셋하므로 쓰지 않고,
+    _subset_font_program()으로 만든 폰트 프로그램과 FontName만 새 폰트에 넣는다.
+    (MuPDF 서브셋은 glyph id를 유지하므로 글자 폭/CID 매핑은 그대로 맞는다)
+    """
+    descriptors = [
+        xref for xref in range(first_new_xref, doc.xref_length())
+        if doc.xref_get_key(xref, "Type") == ("name", "/FontDescriptor")
+    ]
+    if not descriptors:
+        return
+
+    subset = _subset_font_program(chars)
+    if subset is None:
+        return
+    subset_key, program, font_name = subset
+
+    # xref_get_key는 이름의 #20 등을 풀어서 돌려주므로 다시 escape
+    font_name = "/" + "".join(
+        c if c.isalnum() or c in "+-_." else f"#{ord(c):02X}" for c in font_name[1:]
+    )
+    layer_font_name = _get_layer_font().name
+
+    for xref in descriptors:
+        kind, value = doc.xref_get_key(xref, subset_key)
+        if kind != "xref" or not doc.xref_get_key(xref, "FontName")[1].endswith(layer_font_name):
+            continue
+        file_xref = int(value.split()[0])
+        doc.update_stream(file_xref, program)
+        if subset_key == "FontFile2":
+            doc.xref_set_key(file_xref, "Length1", str(len(program)))
+        doc.xref_set_key(xref, "FontName", font_name)
+
+
+def write_searchable_pdf(source, results, output_path: str, profile: str = DEFAULT_PROFILE) -> dict:
+    """
+    OCR로 처리한 페이지에 보이지 않는 텍스트 레이어를 넣은 사본을 저장.
+    results는 extract_pages(..., keep_words=True) 결과.
+    source는 다시 열 수 있어야 한다 (경로 또는 메모리 버퍼).
+    원본에 들어 있던 폰트/객체는 그대로 두고 레이어와 레이어 폰트(서브셋)만 더한다.
+    레이어 쓰기 + 저장에 걸린 시간, 원본/결과 파일 크기와 그 차이(레이어 부담)를 반환.
+    """
+    start = time.perf_counter()
+    doc = open_pdf(source)
+    if isinstance(source, (str, os.PathLike)):
+        original_size = os.path.getsize(source)
+    else:
+        original_size = len(doc.stream) if doc.stream is not None else 0
+
+    first_new_xref = doc.xref_length()
+    layered = 0
+    chars = set()
+    for result in results:
+        if result["route"] != "ocr":
+            continue
+        chars.update(*(w["text"] for w in result.get("words", [])))
+        add_ocr_layer(
+            doc[result["page"] - 1], result.get("words", []),
+            confidence=result["confidence"], profile=profile,
+        )
+        layered += 1
+
+    # 내장 CJK 폰트를 통째로 넣으면 1MB 이상 커지므로 쓴 글자만 남긴다
+    try:
+        _subset_layer_fonts(doc, first_new_xref, "".join(sorted(chars)))
+    except Exception as e:
+        print(f"[WARN] 폰트 서브셋 실패, 전체 폰트를 포함합니다: {e}", file=sys.stderr)
+
+    # 원본 스트림을 다시 압축하면 크기 비교가 레이어 부담을 보여 주지 못하므로
+    # deflate/garbage 없이 저장하고, 새로 더한 스트림만 압축한다
+    for xref in range(first_new_xref, doc.xref_length()):
+        if doc.xref_is_stream(xref) and doc.xref_get_key(xref, "Filter")[0] == "null":
+            doc.update_stream(xref, doc.xref_stream(xref), compress=True)
+    doc.save(output_path)
+    doc.close()
+
+    output_size = os.path.getsize(output_path)
+    return {
+        "pages": layered,
+        "seconds": time.perf_counter() - start,
+        "original_size": original_size,
+        "output_size": output_size,
+        "layer_size": output_size - original_size,
+    }
+
+
+# =========================
+# 9. 프로파일 벤치마크
+# =========================
+def benchmark_profiles(pdf_paths, profiles=None, lang: str = "kor") -> list:
+    """
+    같은 코퍼스를 프로파일별로 OCR해서 속도와 글자 수(공백 제외)를 잰다.
+    프로파일은 OCR에만 영향을 주므로 텍스트 레이어와 무관하게 모든 페이지를 OCR한다.
+    """
+    rows = []
+    for name in profiles or list(PROFILES):
+        get_profile(name)
+        pages = 0
+        chars = 0
+        start = time.perf_counter()
+
+        for path in pdf_paths:
+            doc = open_pdf(path)
+            for page in doc:
+                text = ocr_page(page, lang=lang, profile=name)
+                pages += 1
+                chars += len("".join(text.split()))
+            doc.close()
+
+        seconds = time.perf_counter() - start
+        rows.append({
+            "profile": name,
+            "pages": pages,
+            "seconds": seconds,
+            "pages_per_sec": pages / seconds if seconds else 0.0,
+            "chars": chars,
+            "chars_per_page": chars / pages if pages else 0.0,
+        })
+        print(f"[INFO] {name}: {pages}페이지 {seconds:.1f}초", file=sys.stderr)
+
+    return rows
+
+
+def format_bench_table(rows) -> str:
+    lines = [
+        f"{'profile':<10} {'pages':>6} {'sec':>8} {'pages/sec':>10} {'chars':>9} {'chars/page':>11}",
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['profile']:<10} {r['pages']:>6} {r['seconds']:>8.1f} "
+            f"{r['pages_per_sec']:>10.3f} {r['chars']:>9} {r['chars_per_page']:>11.1f}"
+        )
+    return "\n".join(lines)
+
+
+# =========================
+# 10. 결과 저장
+# =========================
+def default_output_path(pdf_path: str) -> str:
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    return os.path.join(desktop, base_name + ".txt")
+
+
+def write_output(text: str, output_path: str):
+    """output_path가 '-'이면 stdout으로, 아니면 파일로 저장"""
+    if output_path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(text)
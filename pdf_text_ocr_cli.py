@@ -1,357 +1,196 @@
 import os
 import sys
-import io
-import platform
-import re
-import fitz                   # PyMuPDF
-import pytesseract
-from PIL import Image, ImageOps
-
-# =========================
-# 0. tessdata_best 경로 설정
-# =========================
-# tessdata_best 안에 kor.traineddata, (eng.traineddata, osd.traineddata 있어도 상관 없음)
-os.environ["TESSDATA_PREFIX"] = "/Users/kim_jinwoong/Desktop/project/프로젝트_개인/Extract_Text_from_PDF(img)/tessdata_best"
-
-# =========================
-# 헬퍼함수 추가
-# =========================
-def force_heads_to_newline(text: str) -> str:
-    """
-    본문 안에 섞여 있는 머리표들(1. / (1) / (가) / 가. / *) 앞에
-    강제로 줄바꿈(\n)을 넣어, 항상 줄 맨 앞에 오도록 만든다.
-    """
-    patterns = [
-        r'\s+(\(\d+\))',      # ... (1)
-        r'\s+(\([가-힣]\))',  # ... (가)
-        r'\s+([가-힣]\.)',    # ... 가.
-        r'\s+(\d+\.)',        # ... 1.
-        r'\s+(\*)',           # ... *
-    ]
-    for pat in patterns:
-        text = re.sub(pat, r'\n\1', text)
-    return text
-
-# =========================
-# 노이즈 지우기
-# =========================
-def clean_noise(text: str) -> str:
-    """
-    OCR 및 PDF 텍스트에서 공통으로 노이즈 제거:
-    - '|' 제거
-    - 영문 알파벳(A~Z, a~z) 제거
-    """
-    # 1) '|' 완전 제거
-    text = text.replace("|", "")
-
-    # 2) 영문 알파벳 제거
-    text = re.sub(r'[A-Za-z]+', ' ', text)
-
-    return text
-
-# =========================
-# 1. Tesseract 실행 파일 경로 설정
-# =========================
-def init_tesseract_path():
-    system = platform.system()
-
-    # PyInstaller나 exe 기준 base_dir
-    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.argv[0])))
-
-    # 1) exe 옆 tesseract 폴더 우선
-    bundled_tesseract = os.path.join(base_dir, "tesseract", "tesseract.exe")
-    if os.path.exists(bundled_tesseract):
-        pytesseract.pytesseract.tesseract_cmd = bundled_tesseract
-        print(f"[INFO] 번들된 Tesseract 사용: {bundled_tesseract}")
-        return
-
-    # 2) OS별 후보 경로
-    if system == "Windows":
-        candidates = [
-            r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-            r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-        ]
-    elif system == "Darwin":  # macOS
-        candidates = [
-            "/opt/homebrew/bin/tesseract",
-            "/usr/local/bin/tesseract",
-        ]
-    else:  # Linux 등
-        candidates = ["tesseract"]
-
-    for path in candidates:
-        if path == "tesseract" or os.path.exists(path):
-            pytesseract.pytesseract.tesseract_cmd = path
-            print(f"[INFO] Tesseract 경로 설정: {path}")
-            return
-
-    print("[WARN] Tesseract 실행 파일을 찾지 못했습니다. PATH에 있는 tesseract를 사용합니다.")
-
-
-init_tesseract_path()
-
-
-# =========================
-# 2. 문단 머리표 패턴 정의
-# =========================
-HEAD_PATTERNS = [
-    re.compile(r'^\s*\d+\.'),        # 1. 2. 3. ...
-    re.compile(r'^\s*\(\d+\)'),      # (1) (2) ...
-    re.compile(r'^\s*\([가-힣]\)'),   # (가) (나) ...
-    re.compile(r'^\s*[가-힣]\.'),     # 가. 나. ...
-    re.compile(r'^\s*\*'),           # * 항목
-]
-
-
-EXCEPTION_HEADS = [
-    re.compile(r'^\s*\(연령\)'),  
-    # 필요하면 더 추가 가능
-]
-
-def is_paragraph_head(line: str) -> bool:
-    for ex in EXCEPTION_HEADS:
-        if ex.match(line):
-            return False
-    for pat in HEAD_PATTERNS:
-        if pat.match(line):
-            return True
-    return False
-
-
-# =========================
-# 3. PDF 내 텍스트 블록 추출
-# =========================
-def extract_text_blocks(page, min_chars: int = 30) -> str:
-    """
-    PDF 페이지에서 selectable text가 존재할 때 사용하는 경로.
-    '|' 문자는 테이블 윤곽/셀 구분에 쓰이는 경우가 많으므로
-    그냥 삭제해버린다.
-    """
-    blocks = page.get_text("blocks")
-    if not blocks:
-        return ""
-
-    # (x0,y0,x1,y1, text, block_no, block_type, block_flags, ...)
-    blocks = sorted(blocks, key=lambda b: (b[1], b[0]))
-
-    paragraphs = []
-    for block in blocks:
-        text = block[4]
-        if not text:
-            continue
-
-        # 공통 노이즈 제거 (|, 영어알파벳 삭제)
-        text = clean_noise(text.strip())
-
-        if text.strip():
-            paragraphs.append(text.strip())
-
-    if not paragraphs:
-        return ""
-
-    full_text = "\n\n".join(paragraphs).strip()
-
-    # 너무 짧으면(노이즈 수준) 무시하고 OCR로 넘기기
-    if len(full_text) < min_chars:
-        return ""
-
-    return full_text
-
-
-# =========================
-# 4. OCR 결과 문단 정규화
-# =========================
-def normalize_paragraphs(raw_text: str) -> str:
-    """
-    OCR 결과처럼 줄 단위로 끊긴 텍스트를 문단 단위로 재구성하는 함수.
-
-    - '|' 문자는 테이블 구분용이므로 그냥 삭제
-    - 빈 줄(공백만 있는 줄)은 문단 구분으로 사용
-    - 그 외 줄들은 기본적으로 이전 줄과 이어붙임
-    """
-    # '|' + 영어 알파벳 등 노이즈 제거
-    cleaned = clean_noise(raw_text)
-    lines = [line.rstrip() for line in cleaned.splitlines()]
-
-    paragraphs = []
-    buffer = ""
-
-    for line in lines:
-        stripped = line.strip()
-
-        # 1) 완전 빈 줄이면 → 문단 끝
-        if not stripped:
-            if buffer:
-                paragraphs.append(buffer.strip())
-                buffer = ""
-            continue
-
-        # 2) 내용 있는 줄
-        if not buffer:
-            # 새 문단 시작
-            buffer = stripped
-        else:
-            # 이전 버퍼가 문장 부호로 끝나는지 확인
-            # (.,?!… 등 + 한글 문장 끝에 자주 오는 것들)
-            if buffer[-1] in ".?!…）)":
-                # 문장이 확실히 끝났으면 줄바꿈 후 이어붙이기
-                buffer = buffer + "\n" + stripped
-            else:
-                # 같은 문단 안에서 줄만 바뀐 거라고 보고 공백으로 이어붙임
-                buffer = buffer + " " + stripped
-
-    # 마지막 문단 처리
-    if buffer:
-        paragraphs.append(buffer.strip())
-
-    # 문단 사이를 빈 줄로 구분
-    return "\n\n".join(paragraphs)
-
-
-# =========================
-# 5. OCR 경로
-# =========================
-def ocr_page(page, lang: str = "kor") -> str:
-    """
-    PDF 페이지를 이미지로 렌더링한 뒤 Tesseract로 OCR 수행.
-    - 400dpi
-    - Grayscale + autocontrast
-    - kor only / psm 4 / oem 1 / preserve_interword_spaces=1
-    """
-    pix = page.get_pixmap(dpi=400)
-    img_data = pix.tobytes("png")
-    img = Image.open(io.BytesIO(img_data))
-
-    # 그레이스케일 + 자동 대비
-    gray = img.convert("L")
-    gray = ImageOps.autocontrast(gray)
-
-    # 언어는 오직 kor만 사용
-    lang_for_tess = "kor"
-
-    # Tesseract 설정: 한 컬럼 위주 공문서에 맞게 psm 4
-    config = "--psm 4 --oem 1 -c preserve_interword_spaces=1"
-
-    raw_text = pytesseract.image_to_string(gray, lang=lang_for_tess, config=config)
-
-    # 줄 단위 결과를 문단 단위로 재구성
-    normalized = normalize_paragraphs(raw_text)
-    return normalized
-
-
-# =========================
-# 6. 머리표 기준 문단 분해
-# =========================
-def split_paragraphs_by_heads(full_text: str) -> str:
-    """
-    전체 텍스트를 줄 단위로 보면서
-    1. / (1) / (가) / 가. / * 로 시작하는 줄을
-    '새 문단의 머리표'로 보고 문단을 나누는 함수.
-    """
-    # 0) 줄 중간에 끼어 있는 머리표도 강제로 줄바꿈
-    full_text = force_heads_to_newline(full_text)
-
-    lines = full_text.splitlines()
-
-    paragraphs = []
-    current = []
-
-    for line in lines:
-        # 혹시 남아 있을지 모르는 '|' + 영어 노이즈 제거
-        line = clean_noise(line)
-        stripped = line.rstrip()
-
-        # 빈 줄이면 문단 종료
-        if not stripped:
-            if current:
-                paragraphs.append("\n".join(current).strip())
-                current = []
-            continue
-
-        # 머리표인지 확인 (앞쪽 공백 제거 후 판별)
-        head_candidate = stripped.lstrip()
-
-        if is_paragraph_head(head_candidate):
-            # 이전 문단 마감
-            if current:
-                paragraphs.append("\n".join(current).strip())
-                current = []
-            # 새 문단 시작: 머리표가 있는 줄을 첫 줄로
-            current.append(head_candidate)
+import argparse
+import multiprocessing
+
+from pdf_text_ocr import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    benchmark_profiles,
+    default_output_path,
+    extract_pages,
+    format_bench_table,
+    format_confidence_summary,
+    load_pdf_source,
+    merge_pages,
+    record_results_throughput,
+    record_throughput,
+    summarize_confidence,
+    write_output,
+    write_searchable_pdf,
+)
+
+# 추출 / OCR 로직은 pdf_text_ocr.py 에 있다.
+# 이 파일은 명령행 인자를 받아 pdf_text_ocr 와 서브커맨드 모듈로 넘기기만 한다.
+
+
+# =========================
+# 1. bench 서브커맨드
+# =========================
+def bench_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py bench",
+        description="같은 PDF들을 프로파일별로 OCR해서 pages/sec, 글자 수를 비교합니다.",
+    )
+    parser.add_argument("pdf_paths", nargs="+", help="벤치마크에 사용할 PDF 파일들")
+    parser.add_argument(
+        "--profiles",
+        default=",".join(PROFILES),
+        help=f"쉼표로 구분한 프로파일 목록 (기본: {','.join(PROFILES)})",
+    )
+    args = parser.parse_args(argv)
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    for name in profiles:
+        if name not in PROFILES:
+            parser.error(f"알 수 없는 프로파일: {name}")
+    for path in args.pdf_paths:
+        if not os.path.exists(path):
+            print(f"[ERROR] 파일을 찾을 수 없습니다: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    rows = benchmark_profiles(args.pdf_paths, profiles, lang="kor")
+    for row in rows:
+        record_throughput(row["profile"], {"ocr": row["seconds"]}, {"ocr": row["pages"]})
+    print(format_bench_table(rows))
+
+
+# =========================
+# 2. CLI 진입점
+# =========================
+def build_extract_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py",
+        description="PDF(텍스트/스캔)에서 텍스트를 추출합니다. "
+                    "색인 검색은 'pdf_text_ocr_cli.py search -h', "
+                    "프로파일 비교는 'pdf_text_ocr_cli.py bench -h', "
+                    "여러 머신 분산 처리는 'pdf_text_ocr_cli.py queue -h', "
+                    "OCR 비용 예측은 'pdf_text_ocr_cli.py analyze -h', "
+                    "worker 전송 방식 비교는 'pdf_text_ocr_cli.py bench-transport -h' 참고.",
+    )
+    parser.add_argument(
+        "pdf_path",
+        help="PDF 파일 경로 ('-'이면 stdin에서 읽음)",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help="결과 txt 경로 ('-'이면 stdout). 기본값: 바탕화면/[원본파일명].txt, stdin 입력이면 stdout",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="DB",
+        help="페이지별 텍스트를 저장할 SQLite FTS5 색인 파일 (변경 없는 문서는 재추출하지 않음)",
+    )
+    parser.add_argument(
+        "--name",
+        help="색인에 저장할 문서 이름 (기본: 파일 절대 경로, stdin이면 <stdin>). "
+             "같은 이름의 이전 버전은 교체되므로 stdin 문서마다 고유한 이름을 주면 된다",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help=f"OCR 프로파일 (속도/정확도, 기본: {DEFAULT_PROFILE})",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="OCR worker 프로세스 수 (기본 1). 페이지 이미지는 공유 메모리로 전달",
+    )
+    parser.add_argument(
+        "--searchable",
+        metavar="PDF",
+        help="OCR 결과를 보이지 않는 텍스트 레이어로 넣은 PDF 사본 저장 (다음 실행은 OCR 없이 처리)",
+    )
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv and argv[0] == "search":
+        import pdf_text_index
+        return pdf_text_index.main(argv[1:])
+
+    if argv and argv[0] == "bench":
+        return bench_main(argv[1:])
+
+    if argv and argv[0] == "bench-transport":
+        import pdf_text_shm
+        return pdf_text_shm.main(argv[1:])
+
+    if argv and argv[0] == "analyze":
+        import pdf_text_analyze
+        return pdf_text_analyze.main(argv[1:])
+
+    if argv and argv[0] == "queue":
+        import pdf_text_queue
+        return pdf_text_queue.main(argv[1:])
+
+    args = build_extract_parser().parse_args(argv)
+    pdf_path = args.pdf_path
+
+    if pdf_path == "-":
+        source = sys.stdin.buffer
+        if args.index or args.searchable:
+            # 해시/추출/사본 저장에 같은 바이트를 쓰기 위해 한 번만 읽어둔다
+            source = load_pdf_source(source)
+        output_path = args.output or "-"
+    else:
+        if not os.path.exists(pdf_path):
+            print(f"[ERROR] 파일을 찾을 수 없습니다: {pdf_path}", file=sys.stderr)
+            sys.exit(1)
+        source = pdf_path
+        output_path = args.output or default_output_path(pdf_path)
+
+        if args.searchable and os.path.abspath(args.searchable) == os.path.abspath(pdf_path):
+            print("[ERROR] --searchable 경로는 원본 PDF와 달라야 합니다.", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"[INFO] PDF 처리 시작: {'stdin' if pdf_path == '-' else pdf_path}", file=sys.stderr)
+
+    if args.index:
+        import pdf_text_index
+        if args.name:
+            doc_name = args.name
+        elif pdf_path == "-":
+            doc_name = pdf_text_index.STDIN_NAME
         else:
-            # 기존 문단에 이어붙임
-            current.append(stripped)
-
-    # 마지막 문단 처리
-    if current:
-        paragraphs.append("\n".join(current).strip())
-
-    # 문단 사이에 빈 줄 하나씩
-    return "\n\n".join(paragraphs)
-
-
-# =========================
-# 7. PDF 전체 처리
-# =========================
-def extract_pdf_to_text(pdf_path: str, lang: str = "kor") -> str:
-    doc = fitz.open(pdf_path)
-    all_pages_text = []
-
-    for page_index in range(len(doc)):
-        page = doc[page_index]
-        page_num = page_index + 1
-
-        # 1차: PDF 텍스트 추출
-        text = extract_text_blocks(page)
-
-        used_ocr = False
-        if not text:
-            # 텍스트가 거의 없으면 OCR 사용
-            text = ocr_page(page, lang=lang)
-            used_ocr = True
-
-        header = f"-------- {page_num}페이지 --------"
-        page_content = header + "\n\n" + text + "\n"
-        all_pages_text.append(page_content)
-
-        mode = "OCR" if used_ocr else "텍스트"
-        print(f"[INFO] {page_num}/{len(doc)}페이지 처리 ({mode})")
-
-    # 1) 페이지별 텍스트를 하나로 합치기
-    full_text = "\n\n".join(all_pages_text).strip()
-
-    # 2) 문단 머리표(1. / (1) / (가) / 가. / *) 기준으로 다시 문단 분해
-    full_text = split_paragraphs_by_heads(full_text)
-
-    return full_text
-
-
-# =========================
-# 8. CLI 진입점
-# =========================
-def main():
-    if len(sys.argv) < 2:
-        print("사용법: python pdf_text_ocr_cli.py <PDF파일경로>")
-        sys.exit(1)
-
-    pdf_path = sys.argv[1]
-
-    if not os.path.exists(pdf_path):
-        print(f"[ERROR] 파일을 찾을 수 없습니다: {pdf_path}")
-        sys.exit(1)
-
-    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    output_path = os.path.join(desktop, base_name + ".txt")
-
-    print(f"[INFO] PDF 처리 시작: {pdf_path}")
-    text = extract_pdf_to_text(pdf_path, lang="kor")
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(text)
-
-    print(f"[완료] 결과 저장: {output_path}")
+            doc_name = os.path.abspath(pdf_path)
+        results = pdf_text_index.extract_with_index(
+            args.index, source, doc_name, lang="kor", profile=args.profile, jobs=args.jobs,
+            keep_words=bool(args.searchable),
+        )
+    else:
+        results = extract_pages(
+            source, lang="kor", profile=args.profile, jobs=args.jobs,
+            keep_words=bool(args.searchable),
+        )
+
+    # analyze 예상 시간 보정용 (색인에서 읽은 페이지는 제외됨)
+    record_results_throughput(args.profile, results)
+
+    text = merge_pages(results)
+    write_output(text, output_path)
+
+    print(f"[INFO] {format_confidence_summary(summarize_confidence(results))}", file=sys.stderr)
+
+    if args.searchable:
+        layer = write_searchable_pdf(source, results, args.searchable, profile=args.profile)
+        per_page = layer["seconds"] / layer["pages"] * 1000 if layer["pages"] else 0.0
+        print(f"[INFO] 검색 가능한 PDF 저장: {args.searchable} (텍스트 레이어 {layer['pages']}페이지, "
+              f"{layer['seconds']:.2f}초 / 페이지당 {per_page:.1f}ms, "
+              f"크기 {layer['original_size'] / 1024:.1f}KB → {layer['output_size'] / 1024:.1f}KB, "
+              f"레이어 {layer['layer_size'] / 1024:+.1f}KB)",
+              file=sys.stderr)
+
+    if output_path != "-":
+        print(f"[완료] 결과 저장: {output_path}", file=sys.stderr)
 
 
 if __name__ == "__main__":
+    # PyInstaller exe에서 worker 프로세스(-j, queue work -j)가 다시 실행될 때 필요
+    multiprocessing.freeze_support()
     main()
@@ -1,13 +1,16 @@
 import os
 import sys
-import io
 import platform
 import fitz
 import pytesseract
-from PIL import Image, ImageOps
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+from pdf_text_ocr import PROFILES, ROUTE_LABELS, ocr_page_data, route_page
+
+# GUI 기본 프로파일: 기존 설정(psm 6 + 이진화)과 같음
+GUI_DEFAULT_PROFILE = "binarized"
+
 # ======= Tesseract 경로 자동 설정 =========
 def init_tesseract_path():
     system = platform.system()
@@ -124,45 +127,30 @@ def normalize_paragraphs(raw_text: str) -> str:
     return "\n\n".join(paragraphs)
 
 
-def ocr_page(page, lang="kor"):
+def ocr_page(page, lang="kor", profile=GUI_DEFAULT_PROFILE):
     """
     스캔(이미지) 기반 PDF용 OCR 함수.
-    - 페이지를 400dpi 이미지로 렌더링
-    - 그레이스케일 + autocontrast + 이진화 후
-    - Tesseract로 한글 인식
+    - 프로파일(PROFILES)의 dpi로 렌더링
+    - 그레이스케일 + autocontrast (+ 프로파일에 따라 이진화)
+    - 프로파일의 tessdata / psm / oem 으로 Tesseract 한글 인식
+      (신뢰도 낮은 줄은 그 영역만 다른 설정으로 재인식)
     - normalize_paragraphs로 문단 재구성
     """
-    # 1) 해상도 조금 더 높게 렌더링 (300 → 400)
-    pix = page.get_pixmap(dpi=400)
-    img_data = pix.tobytes("png")
-    img = Image.open(io.BytesIO(img_data))
-
-    # 2) 그레이스케일 변환
-    gray = img.convert("L")
-
-    # 3) 자동 대비 조정 (어두운/밝은 영역 강조)
-    gray = ImageOps.autocontrast(gray)
-
-    # 4) 단순 이진화 (threshold 값은 상황 따라 조정 가능, 160~190 사이 시도)
-    bw = gray.point(lambda x: 0 if x < 180 else 255, "1")
-
-    # 5) Tesseract 설정: 한국어 + 일반 문단(`psm 6`), LSTM 엔진(`oem 1`)
-    config = "--psm 6 --oem 1"
-
-    raw_text = pytesseract.image_to_string(bw, lang=lang, config=config)
+    data = ocr_page_data(page, lang=lang, profile=profile)
 
     # 줄 단위 결과를 문단 단위로 재구성
-    normalized = normalize_paragraphs(raw_text)
+    normalized = normalize_paragraphs(data["raw_text"])
 
     return normalized
 
 
-def extract_pdf_to_text(pdf_path, lang="kor", callback=None):
+def extract_pdf_to_text(pdf_path, lang="kor", callback=None, profile=GUI_DEFAULT_PROFILE):
     """
     텍스트 PDF + 스캔 PDF 모두 처리.
-    각 페이지마다:
-      1) 텍스트 추출 시도
-      2) 실패 시 OCR
+    각 페이지마다 (CLI와 같은 route_page 판단):
+      1) 이 도구가 쓴 OCR 레이어가 있으면 그대로 사용 (글자 수와 무관)
+      2) 텍스트 추출 시도
+      3) 실패 시 OCR
     """
     doc = fitz.open(pdf_path)
     all_pages_text = []
@@ -171,21 +159,19 @@ def extract_pdf_to_text(pdf_path, lang="kor", callback=None):
         page = doc[page_index]
         page_num = page_index + 1
 
-        # 1) 텍스트 기반 먼저 시도
-        text = extract_text_blocks(page)
+        # 1), 2) OCR 레이어 / 텍스트 기반 먼저 시도 (텍스트 추출은 GUI 방식 그대로)
+        route, text, _ = route_page(page, text_extractor=extract_text_blocks)
 
-        used_ocr = False
-        if not text:
-            # 2) 스캔본으로 보고 OCR
-            text = ocr_page(page, lang=lang)
-            used_ocr = True
+        if route == "ocr":
+            # 3) 스캔본으로 보고 OCR
+            text = ocr_page(page, lang=lang, profile=profile)
 
         header = f"-------- {page_num}페이지 --------"
         page_content = header + "\n\n" + text + "\n"
         all_pages_text.append(page_content)
 
         if callback:
-            callback(page_num, len(doc), used_ocr)
+            callback(page_num, len(doc), route)
         
     full_text = "\n\n".join(all_pages_text).strip()
     return full_text
@@ -199,7 +185,7 @@ class PDFTextOCRApp:
     def __init__(self, master):
         self.master = master
         master.title("PDF 텍스트 풀기 (텍스트 + 스캔 OCR)")
-        master.geometry("500x220")
+        master.geometry("500x260")
 
         self.pdf_path = None
 
@@ -215,6 +201,14 @@ class PDFTextOCRApp:
         self.select_button = tk.Button(master, text="PDF 선택하기", command=self.select_pdf)
         self.select_button.pack(pady=5)
 
+        # OCR 프로파일 선택 (속도 / 정확도)
+        self.profile_var = tk.StringVar(master, value=GUI_DEFAULT_PROFILE)
+        self.profile_frame = tk.Frame(master)
+        self.profile_frame.pack(pady=5)
+        tk.Label(self.profile_frame, text="OCR 프로파일:").pack(side="left")
+        self.profile_menu = tk.OptionMenu(self.profile_frame, self.profile_var, *PROFILES)
+        self.profile_menu.pack(side="left")
+
         # 변환 버튼
         self.convert_button = tk.Button(master, text="변환 시작", command=self.convert_pdf)
         self.convert_button.pack(pady=10)
@@ -240,8 +234,8 @@ class PDFTextOCRApp:
             self.pdf_path = None
             self.path_label.config(text="선택된 파일: 없음")
 
-    def progress_callback(self, current, total, used_ocr):
-        mode = "OCR" if used_ocr else "텍스트"
+    def progress_callback(self, current, total, route):
+        mode = ROUTE_LABELS[route]
         self.status_label.config(
             text=f"{current}/{total}페이지 처리중... ({mode})",
             fg="blue"
@@ -260,7 +254,8 @@ class PDFTextOCRApp:
             text = extract_pdf_to_text(
                 self.pdf_path,
                 lang="kor",  # 한글 위주 문서라고 보고 기본값 kor 사용
-                callback=self.progress_callback
+                callback=self.progress_callback,
+                profile=self.profile_var.get(),
             )
             desktop = get_desktop_path()
             base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
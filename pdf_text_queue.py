@@ -0,0 +1,510 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import multiprocessing
+from collections import Counter
+
+import fitz
+
+from pdf_text_ocr import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    ROUTE_LABELS,
+    default_output_path,
+    extract_page,
+    format_confidence_summary,
+    merge_pages,
+    pdf_sha256,
+    summarize_confidence,
+)
+
+# =========================
+# 0. 공유 폴더 큐 구조
+# =========================
+# QUEUE/
+#   docs/<doc_id>.json                  문서 정보 (경로, 페이지 수, 프로파일 ...)
+#   pending/<job>                       대기 중인 페이지 작업
+#   claimed/<job>.<만료시각>.<worker>    처리 중 (파일 이름에 lease 만료 시각 포함)
+#   done/<job>                          완료
+#   failed/<job>                        재시도 횟수를 넘긴 작업 (내용: 마지막 오류)
+#   attempts/<job>.json                 실패/lease 만료 횟수와 오류 기록
+#   shards/<doc_id>/<page>.json         페이지별 결과
+#
+# job 이름 = <doc_id>-<페이지번호 5자리>  (이 형식이 아닌 파일은 모든 폴더에서 무시)
+#
+# 작업 가져가기/반납/완료는 모두 같은 파일시스템 안의 os.rename 하나로 처리한다.
+# rename은 원자적이라 여러 노드가 같은 job을 동시에 가져가도 한 명만 성공한다.
+# lease가 만료된 claimed job(작업 중 죽은 노드)은 아무 worker나 pending으로 되돌린다.
+# 만료 판단은 각 노드의 시계를 쓰므로 노드 간 시계는 맞춰져 있어야 한다.
+#
+# 페이지 처리 중 예외가 나거나 lease가 만료되면 시도 횟수를 하나 올린다.
+# max_attempts번 실패한 job은 failed/로 옮겨 더 이상 재시도하지 않는다
+# (깨진 페이지 하나 때문에 worker가 계속 죽는 것을 막기 위함).
+DIRS = ("docs", "pending", "claimed", "done", "failed", "attempts", "shards")
+
+DEFAULT_LEASE = 600         # 페이지 하나 처리 제한 시간(초)
+DEFAULT_POLL = 2.0          # 다른 노드 작업이 끝나기를 기다릴 때 확인 간격(초)
+DEFAULT_MAX_ATTEMPTS = 3    # 이 횟수만큼 실패하면 failed/로 옮김
+
+
+def init_queue(queue_dir: str):
+    for name in DIRS:
+        os.makedirs(os.path.join(queue_dir, name), exist_ok=True)
+
+
+# job 이름 형식. 큐 폴더에 섞여 들어온 다른 파일(.DS_Store 등)은 무시한다.
+JOB_PATTERN = re.compile(r"^[0-9a-f]{64}-\d{5}$")
+
+
+def job_name(doc_id: str, page_num: int) -> str:
+    return f"{doc_id}-{page_num:05d}"
+
+
+def is_job(name: str) -> bool:
+    return JOB_PATTERN.match(name) is not None
+
+
+def parse_job(job: str):
+    doc_id, page = job.rsplit("-", 1)
+    return doc_id, int(page)
+
+
+def parse_claim(name: str):
+    """claimed 파일 이름 -> (job, 만료시각, worker). 큐가 만든 이름이 아니면 None."""
+    parts = name.split(".", 2)
+    if len(parts) != 3 or not is_job(parts[0]) or not parts[1].isdigit():
+        return None
+    job, expiry, worker = parts
+    return job, int(expiry), worker
+
+
+def shard_path(queue_dir: str, doc_id: str, page_num: int) -> str:
+    return os.path.join(queue_dir, "shards", doc_id, f"{page_num:05d}.json")
+
+
+def attempts_path(queue_dir: str, job: str) -> str:
+    return os.path.join(queue_dir, "attempts", job + ".json")
+
+
+def _write_json_atomic(path: str, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _listdir(path: str) -> list:
+    try:
+        return os.listdir(path)
+    except FileNotFoundError:
+        return []
+
+
+def _list_jobs(path: str) -> list:
+    """pending / done / failed 폴더의 job 이름들 (job 형식이 아닌 파일은 제외)"""
+    return [name for name in _listdir(path) if is_job(name)]
+
+
+def _list_claims(path: str) -> list:
+    """claimed 폴더의 [(파일 이름, (job, 만료시각, worker))] (형식이 아닌 파일은 제외)"""
+    claims = []
+    for name in _listdir(path):
+        parsed = parse_claim(name)
+        if parsed is not None:
+            claims.append((name, parsed))
+    return claims
+
+
+# =========================
+# 1. 작업 등록
+# =========================
+def submit(queue_dir: str, pdf_path: str, lang: str = "kor", profile: str = DEFAULT_PROFILE) -> str:
+    """
+    PDF 한 개를 페이지 단위 작업으로 등록하고 doc_id를 반환.
+    이미 등록된 문서(같은 해시)는 결과가 없는 페이지만 다시 등록한다.
+    failed/ 로 빠진 페이지도 시도 횟수를 지우고 다시 등록한다.
+    PDF 경로는 모든 노드에서 같은 경로로 보여야 한다(공유 폴더).
+    """
+    init_queue(queue_dir)
+    pdf_path = os.path.abspath(pdf_path)
+    doc_id = pdf_sha256(pdf_path)
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    _write_json_atomic(os.path.join(queue_dir, "docs", doc_id + ".json"), {
+        "doc_id": doc_id,
+        "path": pdf_path,
+        "pages": page_count,
+        "lang": lang,
+        "profile": profile,
+    })
+    os.makedirs(os.path.join(queue_dir, "shards", doc_id), exist_ok=True)
+
+    queued = set(_list_jobs(os.path.join(queue_dir, "pending")))
+    queued.update(parsed[0] for _, parsed in _list_claims(os.path.join(queue_dir, "claimed")))
+
+    for page_num in range(1, page_count + 1):
+        job = job_name(doc_id, page_num)
+        if job in queued or os.path.exists(shard_path(queue_dir, doc_id, page_num)):
+            continue
+        for path in (os.path.join(queue_dir, "failed", job), attempts_path(queue_dir, job)):
+            if os.path.exists(path):
+                os.remove(path)
+        open(os.path.join(queue_dir, "pending", job), "w").close()
+
+    return doc_id
+
+
+# =========================
+# 2. 작업 가져가기 / lease
+# =========================
+def load_attempts(queue_dir: str, job: str) -> dict:
+    """{"attempts": 실패 횟수, "errors": [오류 메시지, ...]}"""
+    try:
+        return _read_json(attempts_path(queue_dir, job))
+    except (OSError, ValueError):
+        return {"attempts": 0, "errors": []}
+
+
+def release_failed(queue_dir: str, claimed_name: str, error: str,
+                   max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+    """
+    실패한 claimed job을 시도 횟수에 따라 pending(재시도) 또는 failed로 옮긴다.
+    rename에 성공한 worker만 시도 횟수를 기록한다(여러 worker가 같은 만료 job을 보더라도 한 번만 셈).
+    옮긴 곳("pending" / "failed")을 반환하고, 다른 worker가 먼저 옮겼으면 None.
+    """
+    job, _, worker = parse_claim(claimed_name)
+    record = load_attempts(queue_dir, job)
+    attempts = record["attempts"] + 1
+    target = "pending" if attempts < max_attempts else "failed"
+
+    try:
+        os.rename(
+            os.path.join(queue_dir, "claimed", claimed_name),
+            os.path.join(queue_dir, target, job),
+        )
+    except FileNotFoundError:
+        # 다른 worker가 먼저 되돌렸거나 방금 완료됨
+        return None
+
+    record["attempts"] = attempts
+    record["errors"].append(error)
+    _write_json_atomic(attempts_path(queue_dir, job), record)
+
+    if target == "pending":
+        print(f"[WARN] 재등록 ({attempts}/{max_attempts}): {job} (worker {worker}) {error}",
+              file=sys.stderr)
+        return target
+
+    with open(os.path.join(queue_dir, "failed", job), "w", encoding="utf-8") as f:
+        f.write(error + "\n")
+    print(f"[ERROR] {attempts}번 실패, 더 이상 시도하지 않음: {job} (worker {worker}) {error}",
+          file=sys.stderr)
+    return target
+
+
+def reap_expired(queue_dir: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    lease가 만료된 claimed job을 pending으로 되돌린다.
+    만료도 한 번의 실패로 세므로, 처리할 때마다 worker가 죽는 페이지는 결국 failed로 간다.
+    """
+    claimed_dir = os.path.join(queue_dir, "claimed")
+    now = time.time()
+    reaped = 0
+
+    for name, (_, expiry, _) in _list_claims(claimed_dir):
+        if expiry > now:
+            continue
+        if release_failed(queue_dir, name, "lease 만료", max_attempts=max_attempts):
+            reaped += 1
+
+    return reaped
+
+
+def claim(queue_dir: str, worker_id: str, lease: float = DEFAULT_LEASE):
+    """
+    pending job 하나를 가져온다. 성공하면 claimed 파일 이름, 없으면 None.
+    여러 worker가 같은 순서로 경쟁하지 않도록 목록을 섞는다.
+    """
+    pending_dir = os.path.join(queue_dir, "pending")
+    jobs = _list_jobs(pending_dir)
+    random.shuffle(jobs)
+
+    for job in jobs:
+        expiry = int(time.time() + lease)
+        name = f"{job}.{expiry}.{worker_id}"
+        try:
+            os.rename(os.path.join(pending_dir, job), os.path.join(queue_dir, "claimed", name))
+        except FileNotFoundError:
+            continue
+        return name
+
+    return None
+
+
+def complete(queue_dir: str, claimed_name: str) -> bool:
+    """claimed -> done. lease가 만료되어 다른 worker에게 넘어갔으면 False."""
+    job = parse_claim(claimed_name)[0]
+    try:
+        os.rename(
+            os.path.join(queue_dir, "claimed", claimed_name),
+            os.path.join(queue_dir, "done", job),
+        )
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def queue_is_drained(queue_dir: str) -> bool:
+    """대기/처리 중인 job이 없으면 끝. failed/ 의 job은 더 처리하지 않으므로 세지 않는다."""
+    return (
+        not _list_jobs(os.path.join(queue_dir, "pending"))
+        and not _list_claims(os.path.join(queue_dir, "claimed"))
+    )
+
+
+# =========================
+# 3. worker
+# =========================
+def _load_doc_info(queue_dir: str, doc_id: str) -> dict:
+    return _read_json(os.path.join(queue_dir, "docs", doc_id + ".json"))
+
+
+def work(queue_dir: str, worker_id: str = None, lease: float = DEFAULT_LEASE,
+         poll: float = DEFAULT_POLL, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    큐가 빌 때까지 페이지 작업을 가져와 처리한다. 처리한 페이지 수를 반환.
+    결과는 shards/ 에 페이지별 json으로 남긴다(원자적 교체라 중복 처리돼도 안전).
+    페이지 처리 중 예외가 나면 worker는 계속 돌고 그 job만 재시도/실패 처리한다.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    open_docs = {}
+    processed = 0
+
+    try:
+        while True:
+            reap_expired(queue_dir, max_attempts=max_attempts)
+            claimed_name = claim(queue_dir, worker_id, lease=lease)
+
+            if claimed_name is None:
+                if queue_is_drained(queue_dir):
+                    break
+                # 다른 노드가 처리 중인 job이 끝나거나 만료되기를 기다림
+                time.sleep(poll)
+                continue
+
+            job = parse_claim(claimed_name)[0]
+            doc_id, page_num = parse_job(job)
+
+            try:
+                info = _load_doc_info(queue_dir, doc_id)
+                if doc_id not in open_docs:
+                    open_docs[doc_id] = fitz.open(info["path"])
+                doc = open_docs[doc_id]
+
+                result = extract_page(doc[page_num - 1], lang=info["lang"], profile=info["profile"])
+                _write_json_atomic(shard_path(queue_dir, doc_id, page_num), result)
+            except Exception as e:
+                release_failed(queue_dir, claimed_name, f"{type(e).__name__}: {e}",
+                               max_attempts=max_attempts)
+                continue
+
+            if complete(queue_dir, claimed_name):
+                processed += 1
+                mode = ROUTE_LABELS[result["route"]]
+                print(f"[INFO] [{worker_id}] {os.path.basename(info['path'])} "
+                      f"{page_num}/{info['pages']}페이지 처리 ({mode})", file=sys.stderr)
+            else:
+                print(f"[WARN] [{worker_id}] lease 만료 후 완료: {job}", file=sys.stderr)
+    finally:
+        for doc in open_docs.values():
+            doc.close()
+
+    return processed
+
+
+def run_workers(queue_dir: str, workers: int, lease: float = DEFAULT_LEASE,
+                poll: float = DEFAULT_POLL, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """같은 머신에서 worker 프로세스 여러 개를 띄워 큐를 처리한다."""
+    options = {"lease": lease, "poll": poll, "max_attempts": max_attempts}
+    if workers <= 1:
+        work(queue_dir, **options)
+        return
+
+    procs = [
+        multiprocessing.Process(target=work, args=(queue_dir,), kwargs=options)
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+
+# =========================
+# 4. 결과 합치기
+# =========================
+def _output_path(info: dict, output_dir: str = None) -> str:
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(info["path"]))[0]
+        return os.path.join(output_dir, base_name + ".txt")
+    return default_output_path(info["path"])
+
+
+def finalize(queue_dir: str, output_dir: str = None) -> tuple:
+    """
+    모든 페이지 shard가 모인 문서를 extract_pdf_to_text()와 같은 txt로 합쳐 저장.
+    저장 경로가 겹치는 문서(/a/report.pdf, /b/report.pdf 등)는 서로 덮어쓰지 않도록
+    파일 이름 뒤에 doc_id 앞 12자리를 붙인다.
+    ([(저장 경로, OCR 신뢰도 요약)], [(미완료 문서 경로, failed 페이지 번호 목록)])을 반환.
+    """
+    written = []
+    incomplete = []
+
+    docs = [
+        _read_json(os.path.join(queue_dir, "docs", name))
+        for name in sorted(_listdir(os.path.join(queue_dir, "docs")))
+        if name.endswith(".json")
+    ]
+    # 이번에 끝난 문서만이 아니라 등록된 전체 문서 기준으로 겹침을 판단해야 실행마다 이름이 같다
+    path_counts = Counter(os.path.normcase(_output_path(info, output_dir)) for info in docs)
+
+    for info in docs:
+        doc_id = info["doc_id"]
+
+        results = []
+        for page_num in range(1, info["pages"] + 1):
+            path = shard_path(queue_dir, doc_id, page_num)
+            if not os.path.exists(path):
+                break
+            results.append(_read_json(path))
+
+        if len(results) != info["pages"]:
+            failed_pages = [
+                page_num for page_num in range(1, info["pages"] + 1)
+                if os.path.exists(os.path.join(queue_dir, "failed", job_name(doc_id, page_num)))
+            ]
+            incomplete.append((info["path"], failed_pages))
+            continue
+
+        output_path = _output_path(info, output_dir)
+        if path_counts[os.path.normcase(output_path)] > 1:
+            root, ext = os.path.splitext(output_path)
+            output_path = f"{root}-{doc_id[:12]}{ext}"
+            print(f"[WARN] 저장 이름이 다른 문서와 겹쳐 doc_id를 붙임: {info['path']} -> {output_path}",
+                  file=sys.stderr)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(merge_pages(results))
+        written.append((output_path, summarize_confidence(results)))
+
+    return written, incomplete
+
+
+def status(queue_dir: str) -> dict:
+    counts = {
+        name: len(_list_jobs(os.path.join(queue_dir, name)))
+        for name in ("pending", "done", "failed")
+    }
+    counts["claimed"] = len(_list_claims(os.path.join(queue_dir, "claimed")))
+    return counts
+
+
+def failed_jobs(queue_dir: str) -> list:
+    """[(job, 마지막 오류)]"""
+    failed_dir = os.path.join(queue_dir, "failed")
+    jobs = []
+    for job in sorted(_list_jobs(failed_dir)):
+        try:
+            with open(os.path.join(failed_dir, job), encoding="utf-8") as f:
+                error = f.read().strip()
+        except OSError:
+            error = ""
+        jobs.append((job, error))
+    return jobs
+
+
+# =========================
+# 5. queue 서브커맨드
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py queue",
+        description="공유 폴더 큐로 여러 머신/프로세스가 페이지를 나눠 처리합니다.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_submit = sub.add_parser("submit", help="PDF를 페이지 작업으로 등록")
+    p_submit.add_argument("queue_dir")
+    p_submit.add_argument("pdf_paths", nargs="+")
+    p_submit.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE)
+
+    p_work = sub.add_parser("work", help="큐가 빌 때까지 작업 처리")
+    p_work.add_argument("queue_dir")
+    p_work.add_argument("-j", "--workers", type=int, default=1, help="이 머신에서 띄울 worker 프로세스 수")
+    p_work.add_argument("--lease", type=float, default=DEFAULT_LEASE, help=f"페이지 lease(초, 기본 {DEFAULT_LEASE})")
+    p_work.add_argument("--poll", type=float, default=DEFAULT_POLL, help=f"대기 확인 간격(초, 기본 {DEFAULT_POLL})")
+    p_work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f"페이지당 최대 시도 횟수, 넘으면 failed/로 이동 (기본 {DEFAULT_MAX_ATTEMPTS})")
+
+    p_final = sub.add_parser("finalize", help="페이지 결과를 문서별 txt로 합치기")
+    p_final.add_argument("queue_dir")
+    p_final.add_argument("-o", "--output-dir", help="저장 폴더 (기본: 바탕화면)")
+
+    p_status = sub.add_parser("status", help="대기/처리 중/완료/실패 작업 수")
+    p_status.add_argument("queue_dir")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        for path in args.pdf_paths:
+            if not os.path.exists(path):
+                print(f"[ERROR] 파일을 찾을 수 없습니다: {path}", file=sys.stderr)
+                sys.exit(1)
+        for path in args.pdf_paths:
+            doc_id = submit(args.queue_dir, path, lang="kor", profile=args.profile)
+            print(f"[INFO] 등록: {path} ({doc_id[:12]})", file=sys.stderr)
+
+    elif args.command == "work":
+        init_queue(args.queue_dir)
+        run_workers(args.queue_dir, args.workers, lease=args.lease, poll=args.poll,
+                    max_attempts=args.max_attempts)
+        failed = status(args.queue_dir)["failed"]
+        if failed:
+            print(f"[WARN] 실패한 페이지 작업 {failed}개 (queue status로 확인)", file=sys.stderr)
+
+    elif args.command == "finalize":
+        written, incomplete = finalize(args.queue_dir, args.output_dir)
+        for path, summary in written:
+            print(f"[완료] 결과 저장: {path} ({format_confidence_summary(summary)})", file=sys.stderr)
+        for path, failed_pages in incomplete:
+            if failed_pages:
+                pages = ", ".join(map(str, failed_pages))
+                print(f"[ERROR] 실패한 페이지({pages})가 있어 건너뜀: {path} "
+                      f"(원인을 고친 뒤 queue submit으로 다시 등록)", file=sys.stderr)
+            else:
+                print(f"[WARN] 처리되지 않은 페이지가 있어 건너뜀: {path}", file=sys.stderr)
+        if incomplete:
+            sys.exit(1)
+
+    elif args.command == "status":
+        counts = status(args.queue_dir)
+        print(f"대기 {counts['pending']} / 처리 중 {counts['claimed']} / 완료 {counts['done']} "
+              f"/ 실패 {counts['failed']}")
+        for job, error in failed_jobs(args.queue_dir):
+            print(f"  실패 {job}: {error}")
+
+
+if __name__ == "__main__":
+    main()
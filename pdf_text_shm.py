@@ -0,0 +1,344 @@
+import io
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+
+import fitz
+from PIL import Image, ImageOps
+
+from pdf_text_ocr import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    ROUTE_LABELS,
+    get_profile,
+    normalize_paragraphs,
+    ocr_image_data,
+    open_pdf,
+    route_page,
+    words_to_points,
+)
+
+# =========================
+# 0. 공유 메모리 페이지 버퍼
+# =========================
+# 렌더링은 메인 프로세스, OCR은 worker 프로세스에서 한다.
+# 페이지 이미지는 PNG로 인코딩하거나 pickle로 넘기지 않고
+# multiprocessing.shared_memory 블록에 grayscale 픽셀 그대로 렌더링한 뒤
+# worker에는 (블록 이름, width, height, stride)만 보낸다.
+# 블록은 worker가 인식을 끝내는 즉시 반납되어 다음 페이지에 재사용된다.
+
+
+class ShmPool:
+    """
+    페이지 이미지용 SharedMemory 블록 풀.
+    release()는 worker 결과 콜백(다른 스레드)에서 불리므로 반납은 큐로 받는다.
+    """
+
+    def __init__(self):
+        self.blocks = {}            # name -> SharedMemory
+        self.free = []
+        self.returned = queue.Queue()
+        self.in_use = 0
+
+    def acquire(self, size: int) -> shared_memory.SharedMemory:
+        self._drain()
+        for i, block in enumerate(self.free):
+            if block.size >= size:
+                self.in_use += 1
+                return self.free.pop(i)
+
+        # 맞는 크기가 없으면 여유 블록 하나를 버리고 새로 만든다 (블록 수 유지)
+        if self.free:
+            self._destroy(self.free.pop(0))
+
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self.blocks[block.name] = block
+        self.in_use += 1
+        return block
+
+    def release(self, name: str):
+        """어느 스레드에서 불러도 된다."""
+        self.returned.put(name)
+
+    def wait_for_release(self):
+        """반납된 블록이 생길 때까지 기다린다."""
+        self._take(self.returned.get())
+
+    def _drain(self):
+        while True:
+            try:
+                name = self.returned.get_nowait()
+            except queue.Empty:
+                return
+            self._take(name)
+
+    def _take(self, name: str):
+        self.in_use -= 1
+        self.free.append(self.blocks[name])
+
+    def _destroy(self, block):
+        del self.blocks[block.name]
+        block.close()
+        block.unlink()
+
+    def close(self):
+        for block in list(self.blocks.values()):
+            self._destroy(block)
+        self.free = []
+
+
+def _start_resource_tracker():
+    """
+    worker가 블록에 attach할 때 부모와 같은 resource tracker를 쓰도록 Pool보다 먼저 띄운다.
+    resource tracker는 POSIX 전용이다 (Windows는 핸들이 닫히면 블록이 사라지므로 필요 없음).
+    """
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def render_to_shm(page, settings: dict, pool: ShmPool) -> dict:
+    """페이지를 grayscale로 렌더링해서 공유 메모리 블록에 복사하고 descriptor를 반환"""
+    pix = page.get_pixmap(dpi=settings["dpi"], colorspace=fitz.csGRAY)
+    size = pix.stride * pix.height
+    block = pool.acquire(size)
+    block.buf[:size] = pix.samples_mv
+    return {
+        "shm": block.name,
+        "width": pix.width,
+        "height": pix.height,
+        "stride": pix.stride,
+    }
+
+
+def attach_gray(desc: dict) -> Image.Image:
+    """
+    worker 쪽: descriptor의 블록을 복사 없이 이미지로 열고 autocontrast 적용.
+    autocontrast 결과는 새 이미지이므로 이후에는 블록을 참조하지 않는다.
+    """
+    block = shared_memory.SharedMemory(name=desc["shm"])
+    try:
+        view = Image.frombuffer(
+            "L", (desc["width"], desc["height"]), block.buf,
+            "raw", "L", desc["stride"], 1,
+        )
+        gray = ImageOps.autocontrast(view)
+        del view
+    finally:
+        block.close()
+    return gray
+
+
+def _ocr_task(desc: dict, lang: str, profile: str, keep_words: bool = False) -> dict:
+    start = time.perf_counter()
+    data = ocr_image_data(attach_gray(desc), lang=lang, profile=profile)
+    result = {
+        "text": normalize_paragraphs(data["raw_text"]),
+        "confidence": data["confidence"],
+        "ocr_stats": data["stats"],
+    }
+    if keep_words:
+        result["words"] = words_to_points(data["words"], data["dpi"])
+    # worker 한 개 기준 처리 시간 (메인 프로세스 렌더링 시간은 따로 더함)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+# =========================
+# 1. 병렬 추출
+# =========================
+def _on_recognized(pool: ShmPool, name: str, page_num: int, total: int):
+    """인식이 끝나면 블록을 바로 반납 (메인 프로세스의 결과 처리 스레드에서 호출)"""
+    def callback(_):
+        pool.release(name)
+        print(f"[INFO] {page_num}/{total}페이지 처리 (OCR)", file=sys.stderr)
+    return callback
+
+
+def extract_pages_parallel(source, lang: str = "kor", profile: str = DEFAULT_PROFILE,
+                           workers: int = 2, keep_words: bool = False) -> list:
+    """
+    extract_pages()와 같은 결과를 OCR worker 프로세스 여러 개로 만든다.
+    텍스트 / OCR 레이어 경로 페이지는 메인 프로세스에서 바로 처리하고,
+    OCR 페이지만 공유 메모리 블록으로 worker에 넘긴다.
+    동시에 처리 중인 페이지(=블록 수)는 workers * 2개로 제한한다.
+    페이지별 seconds는 worker 한 개 기준 시간(렌더링 + OCR)이라 직렬 처리 기록과 같은 단위다.
+    """
+    settings = get_profile(profile)
+    doc = open_pdf(source)
+    total = len(doc)
+    results = [None] * total
+    render_seconds = {}
+    pending = []
+    max_in_flight = workers * 2
+
+    _start_resource_tracker()
+    pool = ShmPool()
+
+    try:
+        with multiprocessing.Pool(workers) as procs:
+            for page_index in range(total):
+                page = doc[page_index]
+                start = time.perf_counter()
+                route, text, confidence = route_page(page)
+                if route != "ocr":
+                    results[page_index] = {
+                        "page": page_index + 1,
+                        "text": text,
+                        "route": route,
+                        "confidence": confidence,
+                        "ocr_stats": None,
+                        "seconds": time.perf_counter() - start,
+                    }
+                    print(f"[INFO] {page_index + 1}/{total}페이지 처리 ({ROUTE_LABELS[route]})",
+                          file=sys.stderr)
+                    continue
+
+                while pool.in_use >= max_in_flight:
+                    pool.wait_for_release()
+
+                desc = render_to_shm(page, settings, pool)
+                render_seconds[page_index] = time.perf_counter() - start
+                async_result = procs.apply_async(
+                    _ocr_task, (desc, "kor", profile, keep_words),
+                    callback=_on_recognized(pool, desc["shm"], page_index + 1, total),
+                    error_callback=lambda _, name=desc["shm"]: pool.release(name),
+                )
+                pending.append((page_index, async_result))
+
+            for page_index, async_result in pending:
+                ocr = async_result.get()
+                ocr["seconds"] += render_seconds[page_index]
+                results[page_index] = {"page": page_index + 1, "route": "ocr", **ocr}
+    finally:
+        pool.close()
+
+    return results
+
+
+# =========================
+# 2. 전송 방식 벤치마크
+# =========================
+# 같은 페이지들을 렌더링해서 worker로 넘기고 worker가 이미지를 만들어
+# autocontrast까지 하는 시간만 잰다 (OCR 제외, 전송 비용 비교용).
+# - png    : 기존 방식. PNG 인코딩 → pickle → worker에서 디코딩
+# - pickle : 픽셀 bytes를 그대로 pickle
+# - shm    : 공유 메모리 블록 + descriptor
+def _bench_png(payload):
+    gray = Image.open(io.BytesIO(payload)).convert("L")
+    return ImageOps.autocontrast(gray).size
+
+
+def _bench_pickle(payload):
+    samples, width, height, stride = payload
+    view = Image.frombuffer("L", (width, height), samples, "raw", "L", stride, 1)
+    return ImageOps.autocontrast(view).size
+
+
+def _bench_shm(desc):
+    return attach_gray(desc).size
+
+
+def benchmark_transport(pdf_path: str, page_count: int = 300, workers: int = 4,
+                        profile: str = DEFAULT_PROFILE, methods=("png", "pickle", "shm")) -> list:
+    settings = get_profile(profile)
+    _start_resource_tracker()
+    rows = []
+
+    with fitz.open(pdf_path) as doc, multiprocessing.Pool(workers) as procs:
+        for method in methods:
+            pool = ShmPool()
+            lock = threading.Lock()
+            in_flight = [0]
+            slot_free = threading.Condition(lock)
+            sent_bytes = 0
+            pending = []
+            start = time.perf_counter()
+
+            def finished(_, name=None):
+                if name:
+                    pool.release(name)
+                with slot_free:
+                    in_flight[0] -= 1
+                    slot_free.notify()
+
+            try:
+                for i in range(page_count):
+                    page = doc[i % len(doc)]
+
+                    with slot_free:
+                        while in_flight[0] >= workers * 2:
+                            slot_free.wait()
+                        in_flight[0] += 1
+
+                    if method == "shm":
+                        desc = render_to_shm(page, settings, pool)
+                        sent_bytes += len(desc["shm"]) + 24
+                        pending.append(procs.apply_async(
+                            _bench_shm, (desc,),
+                            callback=lambda r, name=desc["shm"]: finished(r, name),
+                        ))
+                        continue
+
+                    pix = page.get_pixmap(dpi=settings["dpi"], colorspace=fitz.csGRAY)
+                    if method == "png":
+                        payload = pix.tobytes("png")
+                        sent_bytes += len(payload)
+                        task = _bench_png
+                    else:
+                        payload = (pix.samples, pix.width, pix.height, pix.stride)
+                        sent_bytes += len(payload[0])
+                        task = _bench_pickle
+                    pending.append(procs.apply_async(task, (payload,), callback=finished))
+
+                for async_result in pending:
+                    async_result.get()
+            finally:
+                pool.close()
+
+            seconds = time.perf_counter() - start
+            rows.append({
+                "method": method,
+                "pages": page_count,
+                "seconds": seconds,
+                "pages_per_sec": page_count / seconds if seconds else 0.0,
+                "mb_sent": sent_bytes / (1024 * 1024),
+            })
+            print(f"[INFO] {method}: {page_count}페이지 {seconds:.1f}초", file=sys.stderr)
+
+    return rows
+
+
+def format_transport_table(rows) -> str:
+    lines = [f"{'method':<8} {'pages':>6} {'sec':>8} {'pages/sec':>10} {'MB sent':>10}"]
+    for r in rows:
+        lines.append(
+            f"{r['method']:<8} {r['pages']:>6} {r['seconds']:>8.2f} "
+            f"{r['pages_per_sec']:>10.2f} {r['mb_sent']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pdf_text_ocr_cli.py bench-transport",
+        description="렌더링 → OCR worker 페이지 전송 방식(png / pickle / 공유 메모리)을 비교합니다. OCR은 하지 않습니다.",
+    )
+    parser.add_argument("pdf_path", help="벤치마크용 PDF (페이지를 반복해서 사용)")
+    parser.add_argument("--pages", type=int, default=300, help="전송할 페이지 수 (기본 300)")
+    parser.add_argument("-j", "--workers", type=int, default=4, help="worker 프로세스 수 (기본 4)")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help=f"렌더링 dpi를 가져올 프로파일 (기본: {DEFAULT_PROFILE})")
+    args = parser.parse_args(argv)
+
+    rows = benchmark_transport(args.pdf_path, page_count=args.pages, workers=args.workers,
+                               profile=args.profile)
+    print(format_transport_table(rows))
+
+
+if __name__ == "__main__":
+    main()